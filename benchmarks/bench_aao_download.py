@@ -0,0 +1,148 @@
+"""
+Run the AAO download pipeline against a local stand-in for the USCIS site.
+
+    python -m benchmarks.bench_aao_download [--decisions 40] [--latency 0.2] [--flaky 0.1]
+
+A threaded HTTP server serves an index page and synthetic decision PDFs (requires
+PyMuPDF), with ETag/Last-Modified validators, per-request latency and randomly
+failing requests. The pipeline runs sequentially, concurrently from cold, and again
+warm, where every PDF should come back as 304 Not Modified, and once more after two
+new decisions are published, where only those two are downloaded and extracted.
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scraper
+from src.aao_store import AAOStore
+from benchmarks.bench_pdf_extraction import make_synthetic_pdf
+
+
+class StandInSite:
+    def __init__(self, pdf_bytes, decisions, latency, flaky, seed=0):
+        self.pdf_bytes = pdf_bytes
+        self.decisions = decisions
+        self.latency = latency
+        self.flaky = flaky
+        self.last_modified = formatdate(time.time() - 3600, usegmt=True)
+        self.requests = {"index": 0, "pdf": 0, "not_modified": 0, "failed": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def pdf(self, n):
+        # Trailing bytes after %%EOF are ignored by readers but give every decision its own hash.
+        body = self.pdf_bytes + f"\n% decision {n}\n".encode("ascii")
+        return body, '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+
+    def index_html(self):
+        links = "".join(f'<li><a href="/decisions/{n}.pdf">Decision {n}</a></li>' for n in range(self.decisions))
+        return f"<html><body><ul>{links}</ul></body></html>".encode("utf-8")
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                time.sleep(site.latency)
+                if self.path == "/index":
+                    with site._lock:
+                        site.requests["index"] += 1
+                    return self._send(200, site.index_html(), {"Content-Type": "text/html"})
+                match = re.fullmatch(r"/decisions/(\d+)\.pdf", self.path)
+                if not match:
+                    return self._send(404)
+                body, etag = site.pdf(int(match.group(1)))
+                with site._lock:
+                    if site._rng.random() < site.flaky:
+                        site.requests["failed"] += 1
+                        return self._send(503)
+                    if self.headers.get("If-None-Match") == etag:
+                        site.requests["not_modified"] += 1
+                        return self._send(304, headers={"ETag": etag})
+                    site.requests["pdf"] += 1
+                self._send(200, body, {
+                    "Content-Type": "application/pdf",
+                    "ETag": etag,
+                    "Last-Modified": site.last_modified
+                })
+
+        return Handler
+
+
+def run(index_url, workdir, name, workers):
+    """Run the pipeline stage by stage, the way scrape_aao_pdfs does, timing each stage."""
+    raw_dir = os.path.join(workdir, "raw")
+    manifest_path = os.path.join(raw_dir, "manifest.json")
+    session = scraper.make_session(workers, backoff=0.05)
+
+    started = time.perf_counter()
+    pdfs = scraper.find_aao_pdfs(session, index_url)
+    entries = scraper.download_aao_pdfs(pdfs, session, workers, raw_dir, manifest_path)
+    downloaded = time.perf_counter()
+    store = AAOStore(os.path.join(workdir, "processed", "aao_decisions.sqlite3"))
+    scraper.extract_aao_decisions(entries, store, scraper.EXTRACT_WORKERS)
+    extracted = time.perf_counter()
+    count = len(store)
+    store.close()
+    return name, downloaded - started, extracted - downloaded, count
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--decisions", type=int, default=40, help="PDFs listed on the index page")
+    args.add_argument("--pages", type=int, default=5, help="pages per synthetic PDF")
+    args.add_argument("--latency", type=float, default=0.2, help="seconds added to every response")
+    args.add_argument("--flaky", type=float, default=0.1, help="fraction of PDF requests answered with 503")
+    args.add_argument("--workers", type=int, default=scraper.DOWNLOAD_WORKERS, help="concurrent downloads")
+    args = args.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "decision.pdf")
+        make_synthetic_pdf(pdf_path, args.pages)
+        with open(pdf_path, "rb") as f:
+            site = StandInSite(f.read(), args.decisions, args.latency, args.flaky)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), site.handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        index_url = f"http://127.0.0.1:{server.server_address[1]}/index"
+        try:
+            rows = [
+                run(index_url, os.path.join(tmp, "sequential"), "sequential, cold", 1),
+                run(index_url, os.path.join(tmp, "concurrent"), f"{args.workers} workers, cold", args.workers),
+                run(index_url, os.path.join(tmp, "concurrent"), f"{args.workers} workers, warm", args.workers),
+            ]
+            site.decisions += 2
+            rows.append(run(index_url, os.path.join(tmp, "concurrent"), "2 newly published", args.workers))
+        finally:
+            server.shutdown()
+
+    print(f"\n{args.decisions} decisions, {args.latency:.2f}s latency, {args.flaky:.0%} failing requests")
+    print(f"  {'run':<22} {'download':>9} {'extract':>9}")
+    for name, download_s, extract_s, count in rows:
+        print(f"  {name:<22} {download_s:8.2f}s {extract_s:8.2f}s  {count} decisions")
+    print(f"  server: {site.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+End-to-end benchmark: the full pipeline against a local fake Ollama server.
+
+    python -m benchmarks.bench_e2e [--paragraphs 60,240] [--formats txt,docx,pdf]
+                                   [--profile fast] [--output e2e.json] [--compare old.json]
+
+For every (format, size) pair a synthetic petition is generated and main.py runs
+on it in a fresh process, in an empty working directory (no LLM cache, no learned
+examples, no knowledge base). Each run reports wall time, peak RSS, LLM call totals
+and the per-stage times from the run's metrics file. Results are written as sorted,
+rounded JSON so two commits can be compared with --compare (or plain diff); with
+--compare the exit status is 1 if any metric regressed by more than --threshold.
+PDF text extraction drops blank lines, so PDF petitions segment into fewer, longer
+paragraphs than the same text as txt/docx; compare runs of the same format.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_ollama import FakeOllama, LATENCY_PROFILES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One template per segment: most match the keyword table, a few don't and go
+# through the local classifier / LLM, like real drafts.
+PARAGRAPH_TEMPLATES = [
+    "Summary of achievements: Dr. {name} completed a doctorate in {field} and has {years} years of research experience.",
+    "Dr. {name} developed a novel framework for {topic} that independent laboratories adopted, an original contribution of major significance.",
+    "Dr. {name} published {count} papers in the journal of {field}, which have received {citations} citations.",
+    "Dr. {name} served as a peer reviewer for {count} conferences, judging the work of others in {field}.",
+    "As director of the {topic} program, Dr. {name} led the team of {count} engineers and played a critical role.",
+    "The work was featured in {outlet}, and Dr. {name} was interviewed by {outlet} about {topic}.",
+    "Dr. {name} has risen to the very top of {field}; the totality of evidence shows extraordinary ability.",
+    "Dr. {name} intends to continue research on {topic} in the United States, benefiting its industry.",
+    "Over {years} years the team shipped {count} releases of the {topic} platform used by many customers.",
+    "Colleagues describe Dr. {name} as a renowned expert and a leading figure whose insights are invaluable.",
+]
+LETTER = [
+    "Letter of recommendation from Professor {ref}",
+    "Dear USCIS Officer,",
+    "I have known Dr. {name} for {years} years. Dr. {name} is a renowned expert in {field} whose work on "
+    "{topic} changed how our laboratory approaches the problem. I strongly recommend approval.",
+    "Sincerely,\nProfessor {ref}",
+]
+FIELDS = ["machine learning", "computational biology", "materials science", "robotics"]
+TOPICS = ["distributed inference", "protein folding", "battery chemistry", "motion planning"]
+OUTLETS = ["Wired", "The New York Times", "Nature News", "TechCrunch"]
+
+
+def make_petition(paragraphs, seed=0):
+    """A list of paragraphs: body text with a recommendation letter every 20 paragraphs."""
+    rng = random.Random(seed)
+    out = []
+    letters = 0
+    while len(out) < paragraphs:
+        values = {
+            "name": "Doe", "field": rng.choice(FIELDS), "topic": rng.choice(TOPICS),
+            "outlet": rng.choice(OUTLETS), "years": rng.randint(3, 20), "count": rng.randint(2, 60),
+            "citations": rng.randint(50, 5000), "ref": f"Smith{letters}"
+        }
+        if len(out) % 20 == 19:
+            letters += 1
+            out.extend(part.format(**values) for part in LETTER)
+        else:
+            out.append(rng.choice(PARAGRAPH_TEMPLATES).format(**values))
+    return out[:paragraphs]
+
+
+def write_petition(paragraphs, path, fmt):
+    if fmt == "txt":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs) + "\n")
+    elif fmt == "docx":
+        from docx import Document
+        doc = Document()
+        for para in paragraphs:
+            doc.add_paragraph(para)
+            doc.add_paragraph("")
+        doc.save(path)
+    elif fmt == "pdf":
+        from src.parser import get_fitz
+        fitz = get_fitz()
+        if fitz is None:
+            raise SystemExit("PyMuPDF is required to generate PDF petitions; drop pdf from --formats.")
+        doc = fitz.open()
+        for start in range(0, len(paragraphs), 8):
+            page = doc.new_page()
+            page.insert_textbox(page.rect + (36, 36, -36, -36), "\n\n".join(paragraphs[start:start + 8]), fontsize=9)
+        doc.save(path)
+        doc.close()
+    else:
+        raise ValueError(f"unsupported format {fmt}")
+
+
+def run_pipeline(petition, workdir, ollama_url):
+    """Run main.py on petition in its own process; returns (wall seconds, peak RSS in MB, metrics)."""
+    report = os.path.join(workdir, "report.docx")
+    env = dict(os.environ, OLLAMA_HOST=ollama_url, RISK_ANALYZER_NO_CACHE="1", MPLBACKEND="Agg")
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "main.py"), petition, "-o", report],
+                            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(f"main.py failed on {petition}:\n{stderr.decode(errors='replace')}")
+
+    with open(os.path.join(workdir, "report.metrics.json"), "r", encoding="utf-8") as f:
+        metrics = json.load(f)
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS).
+    peak_kb = usage.ru_maxrss / 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return wall, peak_kb / 1024, metrics
+
+
+def summarize(wall, peak_mb, metrics):
+    llm = metrics["llm"]
+    return {
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": round(peak_mb, 1),
+        "llm_calls": llm["calls"],
+        "prompt_tokens": llm["prompt_tokens"],
+        "completion_tokens": llm["completion_tokens"],
+        "stages": {name: round(stage["total_s"], 3) for name, stage in metrics["stages"].items()}
+    }
+
+
+def flatten(run):
+    flat = {key: value for key, value in run.items() if key != "stages"}
+    flat.update({f"stage.{name}": value for name, value in run.get("stages", {}).items()})
+    return flat
+
+
+def compare(old, new, threshold):
+    """Print per-metric changes; return the list of regressions beyond threshold."""
+    # Ignore differences below these floors; they are within run-to-run noise.
+    floors = {"peak_rss_mb": 5.0}
+    regressions = []
+    for name in sorted(set(old["runs"]) | set(new["runs"])):
+        if name not in old["runs"] or name not in new["runs"]:
+            print(f"{name}: only in {'new' if name in new['runs'] else 'old'} results")
+            continue
+        before, after = flatten(old["runs"][name]), flatten(new["runs"][name])
+        print(name)
+        for metric in sorted(set(before) & set(after)):
+            a, b = before[metric], after[metric]
+            change = (b - a) / a if a else 0.0
+            floor = floors.get(metric, 0.05 if metric.endswith("_s") or metric.startswith("stage.") else 0)
+            regressed = change > threshold and b - a > floor
+            marker = "  <-- regression" if regressed else ""
+            print(f"  {metric:<34} {a:>10} -> {b:>10} ({change:+.0%}){marker}")
+            if regressed:
+                regressions.append((name, metric, a, b))
+    return regressions
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--paragraphs", default="60,240", help="comma-separated petition sizes, in paragraphs")
+    args.add_argument("--formats", default="txt,docx,pdf", help="comma-separated petition formats")
+    args.add_argument("--profile", choices=sorted(LATENCY_PROFILES), default="fast", help="fake Ollama latency")
+    args.add_argument("--output", default="e2e_results.json", help="where to write the results")
+    args.add_argument("--compare", metavar="OLD_JSON", help="results from an earlier run to compare against")
+    args.add_argument("--threshold", type=float, default=0.15, help="relative slowdown reported as a regression")
+    args = args.parse_args(argv)
+
+    sizes = [int(n) for n in args.paragraphs.split(",") if n]
+    formats = [fmt for fmt in args.formats.split(",") if fmt]
+    results = {
+        "config": {"profile": args.profile, "latency": LATENCY_PROFILES[args.profile],
+                   "paragraphs": sizes, "formats": formats},
+        "runs": {}
+    }
+
+    with FakeOllama.from_profile(args.profile) as server, tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            for size in sizes:
+                name = f"{fmt}-{size}"
+                workdir = os.path.join(tmp, name)
+                os.makedirs(workdir)
+                petition = os.path.join(workdir, f"petition.{fmt}")
+                write_petition(make_petition(size), petition, fmt)
+                wall, peak_mb, metrics = run_pipeline(petition, workdir, server.url)
+                run = results["runs"][name] = summarize(wall, peak_mb, metrics)
+                print(f"{name:<12} {run['wall_s']:7.2f}s  {run['peak_rss_mb']:7.1f} MB  "
+                      f"{run['llm_calls']:4d} LLM calls")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        regressions = compare(old, results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
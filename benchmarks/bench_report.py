@@ -0,0 +1,86 @@
+"""
+Benchmark for DOCX report generation.
+
+    python -m benchmarks.bench_report [--sections 10,100,1000] [--repeat 1]
+
+Builds reports from synthetic analyzed sections with the final-assessment LLM call
+replaced by a canned answer, and prints reports/s for each size together with the
+per-stage times recorded by the report's metrics spans. The first report of the
+process also pays for building the shared template; it is timed separately.
+Set RISK_ANALYZER_CHART=table to measure the table chart instead of the matplotlib image.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from src import metrics
+from src import report_generator
+
+CRITERIA = [
+    "Original Contributions", "Authorship of Scholarly Articles", "Judging the Work of Others",
+    "Leading or Critical Role", "Published Material About the Beneficiary", "Awards", "High Salary"
+]
+EXCERPT = (
+    "Dr. Doe is a renowned expert whose framework for distributed inference was adopted by "
+    "three independent laboratories and cited in more than 240 peer-reviewed papers."
+)
+
+
+def synthetic_sections(count, seed=0):
+    """Analyzed-section entries shaped like main.py's, with one buzzword hit each."""
+    rng = random.Random(seed)
+    sections = []
+    for i in range(count):
+        start = EXCERPT.index("renowned expert")
+        sections.append({
+            "section": f"section_{i}",
+            "criteria": f"{rng.choice(CRITERIA)} ({i + 1})",
+            "excerpt": EXCERPT,
+            "risk_level": ("Low", "Medium", "High")[i % 3],
+            "llm_feedback": "- Adoption is asserted but not documented.\n- Citation counts lack context.",
+            "reviewer_voice": "The record does not establish that the contribution is of major significance.",
+            "suggested_language": "The framework is used by three independent laboratories (Exhibits 12-14).",
+            "buzzwords": ["renowned expert"],
+            "buzzword_hits": [{"phrase": "renowned expert", "text": "renowned expert",
+                               "start": start, "end": start + len("renowned expert")}]
+        })
+    return sections
+
+
+def time_report(sections, output_path):
+    run = metrics.start_run()
+    started = time.perf_counter()
+    report_generator.generate_report(sections, output_path, {"similar_letters": [], "conflicting_fields": []})
+    elapsed = time.perf_counter() - started
+    stages = {name: stage["total_s"] for name, stage in run.summary()["stages"].items()}
+    return elapsed, stages
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--sections", default="10,100,1000", help="comma-separated report sizes, in sections")
+    args.add_argument("--repeat", type=int, default=1, help="reports per size; the fastest is reported")
+    args = args.parse_args(argv)
+
+    report_generator.run_local_llm = lambda prompt: "The petition is plausible but needs corroboration."
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "report.docx")
+        started = time.perf_counter()
+        report_generator._get_report_template()
+        print(f"template build (once per process): {time.perf_counter() - started:.3f}s")
+
+        for count in [int(n) for n in args.sections.split(",") if n]:
+            sections = synthetic_sections(count)
+            elapsed, stages = min((time_report(sections, output_path) for _ in range(args.repeat)),
+                                  key=lambda result: result[0])
+            size_kb = os.path.getsize(output_path) / 1024
+            print(f"{count:>5} sections  {1 / elapsed:8.2f} reports/s  ({elapsed:.3f}s, {size_kb:,.0f} KB)")
+            for name, seconds in stages.items():
+                print(f"        {name:<26} {seconds:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Microbenchmark for the regex stage of segment_by_criteria.
+
+    python -m benchmarks.bench_segment_regex [--paragraphs 10000] [--repeat 3]
+
+Compares the old per-pattern re.search loop with parser.match_segment on a
+synthetic petition and checks that both pick the same segment for every paragraph.
+"""
+import argparse
+import random
+import re
+import time
+
+from src import parser
+
+SNIPPETS = [
+    "Dr. Rivera's biography shows a steady career overview across three continents.",
+    "She developed a new framework for low-latency inference that is now used in production.",
+    "Her work was published in the Journal of Applied Computation and has 1,200 citations.",
+    "He served as a peer reviewer for NeurIPS and ICML and was asked to judge the work of others.",
+    "As director of the lab she led the migration of the national grid forecasting system.",
+    "The project was featured in The New York Times and she was interviewed by the BBC.",
+    "Taken together, this evidence shows she has risen to the very top of her field.",
+    "She intends to continue her research in the United States, which will benefit the United States.",
+    "This letter is written to recommend Dr. Rivera without reservation.",
+    "The weather in the valley was mild that spring and the harvest came in early.",
+    "Our team met weekly to discuss progress and plan upcoming milestones.",
+]
+
+
+def legacy_match(paragraph):
+    for pattern, key in parser.PATTERN_TO_KEY.items():
+        if re.search(pattern, paragraph, re.IGNORECASE):
+            return key
+    return None
+
+
+def synthetic_paragraphs(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SNIPPETS) for _ in range(rng.randint(2, 6))) for _ in range(count)]
+
+
+def best_rate(func, paragraphs, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for para in paragraphs:
+            func(para)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(paragraphs) / best
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--paragraphs", type=int, default=10000)
+    args.add_argument("--repeat", type=int, default=3)
+    args = args.parse_args(argv)
+
+    paragraphs = synthetic_paragraphs(args.paragraphs)
+    mismatches = sum(1 for para in paragraphs if legacy_match(para) != parser.match_segment(para))
+    if mismatches:
+        raise SystemExit(f"match_segment disagrees with the legacy loop on {mismatches} paragraphs")
+
+    before = best_rate(legacy_match, paragraphs, args.repeat)
+    after = best_rate(parser.match_segment, paragraphs, args.repeat)
+    print(f"paragraphs:           {len(paragraphs)}")
+    print(f"per-pattern re.search {before:>12,.0f} paragraphs/s")
+    print(f"match_segment         {after:>12,.0f} paragraphs/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
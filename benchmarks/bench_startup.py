@@ -0,0 +1,100 @@
+"""
+Startup guard for the main.py CLI.
+
+    python -m benchmarks.bench_startup [--repeat 5] [--import-budget-ms 200] [--check-budget 1.0]
+
+Imports main in fresh interpreters under `python -X importtime` and reports the
+median import time with the slowest modules it pulled in. It then times
+`main.py --check` on a small petition against a local fake Ollama server. Exits
+with status 1 if:
+- a heavy module (ollama, python-docx, PyPDF2, PyMuPDF, matplotlib, numpy,
+  scikit-learn) is imported at startup;
+- the median import of main exceeds --import-budget-ms;
+- --check fails or takes longer than --check-budget seconds.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_ollama import FakeOllama
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that must only be imported once a run actually needs them.
+DEFERRED_MODULES = ("ollama", "httpx", "docx", "PyPDF2", "pymupdf", "fitz", "matplotlib", "numpy", "sklearn")
+
+
+def import_profile():
+    """Import main in a fresh interpreter; returns {module: (self_us, cumulative_us)} for main's imports."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    modules = {}
+    lines = [line for line in proc.stderr.splitlines() if line.startswith("import time:") and "|" in line]
+    # -X importtime lists a module after everything it imported; main's imports are the
+    # lines between the interpreter's own startup imports (ending with site) and main.
+    names = [line.rsplit("|", 1)[1].strip() for line in lines]
+    start = names.index("site") + 1 if "site" in names else 0
+    for line in lines[start:]:
+        self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "").split("|")]
+        if self_us.isdigit():
+            modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def time_check(workdir, ollama_url):
+    petition = os.path.join(workdir, "petition.txt")
+    with open(petition, "w", encoding="utf-8") as f:
+        f.write("Dr. Doe published 12 papers.\n\nDr. Doe reviewed papers for NeurIPS.\n")
+    env = dict(os.environ, OLLAMA_HOST=ollama_url)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, os.path.join(REPO_ROOT, "main.py"), petition,
+                           "-o", os.path.join(workdir, "report.docx"), "--check"],
+                          cwd=workdir, env=env, capture_output=True, text=True)
+    return time.perf_counter() - started, proc
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--repeat", type=int, default=5, help="fresh interpreters to time the import in")
+    args.add_argument("--import-budget-ms", type=float, default=200.0, help="max median import time of main")
+    args.add_argument("--check-budget", type=float, default=1.0, help="max seconds for main.py --check")
+    args.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = args.parse_args(argv)
+
+    profiles = [import_profile() for _ in range(max(1, args.repeat))]
+    import_ms = statistics.median(profile["main"][1] for profile in profiles) / 1000
+    failures = []
+
+    print(f"import main: {import_ms:.1f} ms (median of {len(profiles)})")
+    slowest = sorted(profiles[-1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {name:<40} {self_us / 1000:7.1f} ms self  {cumulative_us / 1000:7.1f} ms cumulative")
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import main took {import_ms:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+
+    imported = {name.split(".")[0] for profile in profiles for name in profile}
+    eager = sorted(name for name in DEFERRED_MODULES if name in imported)
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+
+    with FakeOllama.from_profile("instant") as server, tempfile.TemporaryDirectory() as tmp:
+        elapsed, proc = time_check(tmp, server.url)
+    print(f"main.py --check: {elapsed:.2f}s (exit status {proc.returncode})")
+    if proc.returncode != 0:
+        failures.append(f"main.py --check failed:\n{proc.stdout}{proc.stderr}")
+    elif elapsed > args.check_budget:
+        failures.append(f"main.py --check took {elapsed:.2f}s (budget {args.check_budget:.1f}s)")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Startup is within budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Evaluate the local section classifier against the LLM-only classification path.
+
+    python -m benchmarks.eval_section_classifier [--data labeled.json] [--threshold 0.3] [--llm]
+
+--data is {label: [paragraph, ...]} like src/data/section_examples.json. When given,
+the classifier is trained on the seed (and learned) examples and scored on it;
+otherwise the seed examples are scored with stratified k-fold cross-validation.
+--llm also runs run_llm_classification on every paragraph (needs Ollama running)
+and reports the hybrid path: local label when confident, LLM label otherwise.
+"""
+import argparse
+import time
+
+from src import parser
+from src.section_classifier import (
+    CONFIDENCE_THRESHOLD, LEARNED_EXAMPLES_PATH, SectionClassifier, load_examples, load_learned_examples
+)
+
+
+def cross_validated_predictions(texts, labels, folds):
+    from sklearn.model_selection import StratifiedKFold
+
+    predictions = [None] * len(texts)
+    seconds = 0.0
+    for train, test in StratifiedKFold(n_splits=folds, shuffle=True, random_state=0).split(texts, labels):
+        classifier = SectionClassifier([texts[i] for i in train], [labels[i] for i in train])
+        started = time.perf_counter()
+        for i, prediction in zip(test, classifier.predict([texts[i] for i in test])):
+            predictions[i] = prediction
+        seconds += time.perf_counter() - started
+    return predictions, seconds
+
+
+def held_out_predictions(texts, include_learned):
+    classifier = SectionClassifier.from_examples(learned_path=LEARNED_EXAMPLES_PATH if include_learned else None)
+    started = time.perf_counter()
+    predictions = classifier.predict(texts)
+    return predictions, time.perf_counter() - started
+
+
+def accuracy(pairs):
+    return sum(1 for predicted, actual in pairs if predicted == actual) / len(pairs) if pairs else 0.0
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--data", help="labeled paragraphs to evaluate on")
+    args.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    args.add_argument("--folds", type=int, default=3, help="cross-validation folds without --data")
+    args.add_argument("--no-learned", action="store_true", help="train on the seed examples only")
+    args.add_argument("--llm", action="store_true", help="also score the LLM-only path (slow)")
+    args = args.parse_args(argv)
+
+    if args.data:
+        texts, labels = load_examples(args.data)
+        predictions, seconds = held_out_predictions(texts, include_learned=not args.no_learned)
+        mode = f"held-out set {args.data}"
+    else:
+        texts, labels = load_examples()
+        if not args.no_learned:
+            learned_texts, learned_labels = load_learned_examples()
+            texts, labels = texts + learned_texts, labels + learned_labels
+        predictions, seconds = cross_validated_predictions(texts, labels, args.folds)
+        mode = f"{args.folds}-fold cross-validation"
+
+    confident = [(label, actual) for (label, conf), actual in zip(predictions, labels) if conf >= args.threshold]
+    print(f"Evaluation on {len(texts)} paragraphs ({mode}), threshold {args.threshold}")
+    print(f"  local classifier, all paragraphs   accuracy {accuracy([(p[0], a) for p, a in zip(predictions, labels)]):.1%}")
+    print(f"  local classifier, confident only   accuracy {accuracy(confident):.1%}  "
+          f"coverage {len(confident) / len(texts):.1%}")
+    print(f"  local classifier speed             {len(texts) / seconds:,.0f} paragraphs/s")
+
+    if args.llm:
+        started = time.perf_counter()
+        llm_labels = []
+        for text in texts:
+            try:
+                label = parser.run_llm_classification(text)
+            except Exception as e:
+                print(f"❌ LLM failed: {e}")
+                label = "other"
+            llm_labels.append(label if label in parser.CATEGORY_LABELS else "other")
+        llm_seconds = time.perf_counter() - started
+        hybrid = [
+            (local if conf >= args.threshold else llm, actual)
+            for (local, conf), llm, actual in zip(predictions, llm_labels, labels)
+        ]
+        llm_share = 1 - len(confident) / len(texts)
+        print(f"  LLM only                           accuracy {accuracy(list(zip(llm_labels, labels))):.1%}  "
+              f"speed {len(texts) / llm_seconds:,.2f} paragraphs/s")
+        print(f"  hybrid (local + LLM fallback)      accuracy {accuracy(hybrid):.1%}  "
+              f"LLM calls avoided {1 - llm_share:.1%}")
+
+
+if __name__ == "__main__":
+    main()
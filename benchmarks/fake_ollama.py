@@ -0,0 +1,205 @@
+"""
+Local stand-in for Ollama's /api/chat endpoint, for benchmarks.
+
+    python -m benchmarks.fake_ollama [--port 11434] [--profile realistic]
+
+Then run the analyzer with OLLAMA_HOST=http://127.0.0.1:<port>. Answers are
+canned but well formed for each prompt the pipeline sends (batch and single
+paragraph classification, structured section analysis, free text), and carry the
+same token count / duration metadata as real Ollama responses. Latency is
+`load` seconds per request plus `per_token` seconds per generated token, and at
+most `parallel` requests are served at once, like OLLAMA_NUM_PARALLEL.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# name -> (load seconds, seconds per generated token, requests served in parallel)
+LATENCY_PROFILES = {
+    "instant": (0.0, 0.0, 64),
+    "fast": (0.02, 0.0005, 8),
+    "realistic": (0.25, 0.02, 4),
+}
+
+SECTION_ANSWER = {
+    "risk_level": "Medium",
+    "risk_analysis": [
+        "The evidence describes the role but does not document its impact with independent sources.",
+        "Claims of recognition rely on the beneficiary's own statements.",
+        "Quantitative evidence such as citation counts or adoption figures is missing."
+    ],
+    "buzzwords": ["renowned expert"],
+    "reviewer_voice": "The record does not establish that the beneficiary meets this criterion.",
+    "suggested_language": "The beneficiary's framework has been adopted by three independent laboratories, "
+                          "as documented in Exhibits 12-14, and cited 240 times in peer-reviewed venues."
+}
+
+FREE_TEXT_ANSWER = (
+    "Risk Analysis:\n- The section lacks independent corroboration.\n- Impact is asserted, not shown.\n\n"
+    "Reviewer Voice:\nThe evidence is insufficient to establish the criterion.\n\n"
+    "Suggested Language:\nThe petitioner's work has been adopted by independent groups, as documented.\n"
+)
+
+ASSESSMENT_ANSWER = (
+    "Overall, the petition presents a plausible case but relies heavily on self-described significance. "
+    "The strongest criteria are judging and authorship, which are supported by documentary evidence. "
+    "Original contributions and critical role claims need independent corroboration, such as letters "
+    "from experts without ties to the beneficiary and evidence of adoption. Expect an RFE on final merits "
+    "unless the record shows sustained acclaim through objective measures."
+)
+
+
+def answer_for(request):
+    """Canned answer text for a chat request body."""
+    prompt = request["messages"][-1]["content"]
+    fmt = request.get("format")
+    if isinstance(fmt, dict):
+        return json.dumps({field: SECTION_ANSWER[field] for field in fmt.get("required", []) if field in SECTION_ANSWER})
+    batch = re.search(r"Below are (\d+) numbered paragraphs", prompt)
+    if batch:
+        return "\n".join(f"{i}: other" for i in range(1, int(batch.group(1)) + 1))
+    if "Respond only with the category label" in prompt:
+        return "other"
+    if "Suggested Language" in prompt:
+        return FREE_TEXT_ANSWER
+    return ASSESSMENT_ANSWER
+
+
+class FakeOllama:
+    def __init__(self, load=0.0, per_token=0.0, parallel=4, host="127.0.0.1", port=0):
+        self.load = load
+        self.per_token = per_token
+        self.stats = {"requests": 0, "streamed": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._slots = threading.Semaphore(max(1, parallel))
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @classmethod
+    def from_profile(cls, name, **kwargs):
+        load, per_token, parallel = LATENCY_PROFILES[name]
+        return cls(load, per_token, parallel, **kwargs)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _metadata(self, prompt_tokens, tokens, started):
+        elapsed_ns = int((time.perf_counter() - started) * 1e9)
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": elapsed_ns,
+            "load_duration": int(self.load * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": 0,
+            "eval_count": tokens,
+            "eval_duration": int(self.per_token * tokens * 1e9)
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                # The Ollama client never needs more than a liveness check here.
+                self._send_json(200, {"models": [{"name": "mistral:latest"}]} if self.path == "/api/tags" else {})
+
+            def do_POST(self):
+                if self.path != "/api/chat":
+                    return self._send_json(404, {"error": f"unsupported endpoint {self.path}"})
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                answer = answer_for(request)
+                # Whitespace-separated pieces stand in for tokens.
+                tokens = re.findall(r"\S+\s*", answer) or [answer]
+                prompt_tokens = sum(len(m["content"]) for m in request["messages"]) // 4
+                with fake._lock:
+                    fake.stats["requests"] += 1
+                    fake.stats["prompt_tokens"] += prompt_tokens
+                    fake.stats["completion_tokens"] += len(tokens)
+
+                with fake._slots:
+                    started = time.perf_counter()
+                    time.sleep(fake.load)
+                    message = {"model": request.get("model"), "created_at": "1970-01-01T00:00:00Z"}
+                    if not request.get("stream", True):
+                        time.sleep(fake.per_token * len(tokens))
+                        return self._send_json(200, dict(
+                            message, message={"role": "assistant", "content": answer},
+                            **fake._metadata(prompt_tokens, len(tokens), started)
+                        ))
+
+                    with fake._lock:
+                        fake.stats["streamed"] += 1
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    try:
+                        for token in tokens:
+                            time.sleep(fake.per_token)
+                            self._write_chunk(dict(message, message={"role": "assistant", "content": token}, done=False))
+                        self._write_chunk(dict(message, message={"role": "assistant", "content": ""},
+                                               **fake._metadata(prompt_tokens, len(tokens), started)))
+                        self.wfile.write(b"0\r\n\r\n")
+                    except (BrokenPipeError, ConnectionResetError):
+                        # The client stopped reading early (e.g. all sections were in).
+                        self.close_connection = True
+
+            def _write_chunk(self, payload):
+                data = json.dumps(payload).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    args.add_argument("--port", type=int, default=11434)
+    args.add_argument("--profile", choices=sorted(LATENCY_PROFILES), default="realistic")
+    args = args.parse_args(argv)
+
+    server = FakeOllama.from_profile(args.profile, port=args.port)
+    print(f"Fake Ollama ({args.profile}) listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
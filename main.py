@@ -1,66 +1,310 @@
+import argparse
+import cProfile
+import glob
+import json
+import multiprocessing
 import os
-from src.parser import extract_text, segment_by_criteria, classify_criteria, extract_declared_field
-from src.report_generator import generate_report
-from src.risk_detector import analyze_section_with_deepseek, check_letter_similarity, detect_field_inconsistencies
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src import metrics
+from src.letter_similarity import LetterIndex
+from src.llm_client import LLM_CONCURRENCY, set_llm_semaphore
+from src.metrics import metrics_path_for
+from src.manifest import manifest_path_for, load_manifest, save_manifest, reusable_analysis
+from src.parser import iter_paragraphs, classify_paragraphs, group_segments, classify_criteria, extract_declared_field, letter_paragraphs, split_recommendation_letters
+from src.preflight import SUPPORTED_EXTENSIONS, run_checks
+from src.risk_detector import analyze_sections_concurrently, check_letter_similarity, detect_field_inconsistencies, MAX_CONCURRENT_SECTIONS, SECTION_TIMEOUT
 
-def main():
-    input_path = "sample_data/main.pdf"
-    output_path = "outputs/rfe_risk_report.docx"
+DEFAULT_INPUT = "sample_data/main.pdf"
+DEFAULT_OUTPUT = "outputs/rfe_risk_report.docx"
+
+
+def analyze_petition(input_path, output_path, letter_archive=None, add_to_archive=False, metrics_path=None):
+    """
+    Analyze one petition and write its report. Stage timings and every LLM call are
+    written to metrics_path (default: next to the report), even if the run fails.
+    """
+    run = metrics.start_run(input=input_path, output=output_path)
+    try:
+        with metrics.span("total"):
+            _analyze_petition(input_path, output_path, letter_archive, add_to_archive)
+    finally:
+        metrics_path = metrics_path or metrics_path_for(output_path)
+        run.write(metrics_path)
+        print(f"⏱️ Metrics saved to: {metrics_path}")
 
-    if not os.path.exists(input_path):
-        print(f"❌ ERROR: Petition file not found at {input_path}")
-        return
 
-    print("📄Reading petition document...")
-    raw_text = extract_text(input_path)
+def _analyze_petition(input_path, output_path, letter_archive, add_to_archive):
+    # --check promises that a missing report directory is created, so create it up front
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
 
-    print("📚 Segmenting petition by EB-1A criteria...")
-    sections = segment_by_criteria(raw_text)
+    # Paragraph labels and section analyses from the previous run of this report.
+    manifest_path = manifest_path_for(output_path)
+    manifest = load_manifest(manifest_path)
+
+    # Pages are decoded lazily, so segmentation (and its LLM batches) starts on
+    # the first page instead of waiting for the whole document to be read.
+    print("📄 Reading and segmenting petition by EB-1A criteria...")
+    with metrics.span("segment") as attrs:
+        paragraphs = metrics.timed_iter("extract", iter_paragraphs(input_path))
+        labeled_paragraphs = classify_paragraphs(paragraphs, known_labels=manifest["paragraphs"])
+        sections = group_segments(labeled_paragraphs)
+        attrs["paragraphs"] = len(labeled_paragraphs)
 
     analyzed_data = []
     declared_fields = set()
 
-    print("🤖 Analyzing each section with Mistral LLM...")
+    print(f"🤖 Analyzing each section with Mistral LLM ({MAX_CONCURRENT_SECTIONS} at a time)...")
+    reused = {}
+    pending = []
     for section_name, content in sections.items():
         if not content.strip():
             continue
 
         criteria = classify_criteria(section_name)
+        previous = reusable_analysis(manifest, section_name, content)
+        if previous:
+            print(f"  ♻️ Unchanged, reusing: {criteria} ({section_name})")
+            reused[section_name] = previous
+            continue
+
         print(f"  ➤ Evaluating: {criteria} ({section_name})")
+        pending.append((section_name, criteria, content))
+
+    with metrics.span("analyze", sections=len(pending), reused=len(reused)):
+        results = analyze_sections_concurrently(
+            [(content, criteria) for _, criteria, content in pending],
+            max_workers=MAX_CONCURRENT_SECTIONS,
+            timeout=SECTION_TIMEOUT
+        )
+    fresh = {section_name: result for (section_name, _, _), result in zip(pending, results)}
 
-        result = analyze_section_with_deepseek(content, criteria)
+    # Reassemble in section order; failed analyses, including partial merges of a
+    # chunked section, are reported but not stored for reuse.
+    reusable = []
+    for section_name, content in sections.items():
+        if section_name in reused:
+            entry = reused[section_name]
+            reusable.append(entry)
+        elif section_name in fresh:
+            result = fresh[section_name]
+            entry = {
+                "section": section_name,
+                "criteria": classify_criteria(section_name),
+                # report_generator.EXCERPT_CHARS; not imported here to keep python-docx off the startup path
+                "excerpt": content[:300] + "..." if len(content) > 300 else content,
+                "llm_feedback": result["llm_feedback"],
+                "reviewer_voice": result["reviewer_voice"],
+                "buzzwords": result["buzzwords"],
+                "buzzword_hits": result.get("buzzword_hits", []),
+                "suggested_language": result.get("suggested_language", ""),
+                "risk_level": result.get("risk_level")
+            }
+            if not result.get("failed"):
+                reusable.append(entry)
+        else:
+            continue
 
         field = extract_declared_field(content)
         if field:
             declared_fields.add(field.lower())
 
-        analyzed_data.append({
-            "section": section_name,
-            "criteria": criteria,
-            "excerpt": content[:300] + "..." if len(content) > 300 else content,
-            "llm_feedback": result["llm_feedback"],
-            "reviewer_voice": result["reviewer_voice"],
-            "buzzwords": result["buzzwords"],
-            "suggested_language": result.get("suggested_language", "")
-        })
+        analyzed_data.append(entry)
 
     print("🔁 Checking for duplicated recommendation letters...")
-    similar_letters = check_letter_similarity(sections)
+    # Letters are archived as "<petition file name>:<letter id>"
+    petition_id = os.path.basename(input_path)
+    letters = split_recommendation_letters(letter_paragraphs(labeled_paragraphs))
+    print(f"  ➤ Found {len(letters)} individual letters")
+    with metrics.span("letters", letters=len(letters)):
+        archive = LetterIndex.load_or_create(letter_archive) if letter_archive else None
+        similar_letters = check_letter_similarity(letters, archive=archive, petition_id=petition_id)
 
     print("⚠️ Checking for field of expertise inconsistencies...")
-    conflicting_fields = detect_field_inconsistencies(sections)
+    with metrics.span("fields"):
+        conflicting_fields = detect_field_inconsistencies(sections)
 
     print("📝 Generating final DOCX report...")
-    generate_report(
-        analyzed_data,
-        output_path=output_path,
-        extra_notes={
-            "similar_letters": similar_letters,
-            "conflicting_fields": [f"{s}: {f}" for s, f in conflicting_fields] if conflicting_fields else []
-        }
-    )
+    with metrics.span("report"):
+        # Imported here so that startup (and --check) doesn't load python-docx
+        from src.report_generator import generate_report
+        generate_report(
+            analyzed_data,
+            output_path=output_path,
+            extra_notes={
+                "similar_letters": similar_letters,
+                "conflicting_fields": [f"{s}: {f}" for s, f in conflicting_fields] if conflicting_fields else []
+            }
+        )
+
+    save_manifest(manifest_path, labeled_paragraphs, sections, reusable)
+
+    if archive is not None and add_to_archive:
+        for name, text in letters.items():
+            archive.add(f"{petition_id}:{name}", text)
+        archive.save(letter_archive)
+        print(f"🗄️ Letter archive updated: {letter_archive} ({len(archive)} letters)")
 
     print(f"✅ Done! Report saved to: {output_path}")
 
+
+def find_petitions(source):
+    """Expand a directory or glob pattern into a sorted list of supported petition files."""
+    if os.path.isdir(source):
+        candidates = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        candidates = glob.glob(source, recursive=True)
+    return sorted(
+        path for path in candidates
+        if os.path.isfile(path) and os.path.splitext(path)[1].lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def _report_paths(inputs, output_dir):
+    """One distinct report path per input, named after the petition file."""
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in inputs]
+    common = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in inputs]) if inputs else ""
+    paths = []
+    taken = set()
+    for path, stem in zip(inputs, stems):
+        name = stem
+        if stems.count(stem) > 1:
+            # a/main.pdf, b/main.pdf and b/main.docx must not overwrite each other:
+            # qualify the name with its directory below the batch root and its extension
+            relative, extension = os.path.splitext(os.path.relpath(os.path.abspath(path), common))
+            name = f"{relative.replace(os.sep, '_')}_{extension.lstrip('.').lower()}"
+        # Anything still clashing (a_b/main.pdf vs a/b_main.pdf) gets a counter
+        unique, counter = name, 2
+        while unique.lower() in taken:
+            unique = f"{name}_{counter}"
+            counter += 1
+        taken.add(unique.lower())
+        paths.append(os.path.join(output_dir, f"{unique}_rfe_risk_report.docx"))
+    return paths
+
+
+def _init_batch_worker(llm_semaphore):
+    set_llm_semaphore(llm_semaphore)
+
+
+def _run_batch_item(input_path, output_path, letter_archive=None):
+    started = time.time()
+    # analyze_petition writes the metrics file whether or not the run succeeds
+    metrics_path = metrics_path_for(output_path)
+    try:
+        analyze_petition(input_path, output_path, letter_archive=letter_archive, metrics_path=metrics_path)
+        return {"input": input_path, "output": output_path, "metrics": metrics_path, "status": "ok",
+                "seconds": round(time.time() - started, 2)}
+    except Exception as e:
+        return {"input": input_path, "output": output_path, "metrics": metrics_path, "status": "failed",
+                "seconds": round(time.time() - started, 2), "error": f"{type(e).__name__}: {e}"}
+
+
+def run_batch(source, output_dir, processes, llm_concurrency, letter_archive=None):
+    """
+    Analyze every petition matched by source on a process pool.
+    All workers share one semaphore, so at most llm_concurrency Ollama requests
+    are in flight across the whole batch. Writes batch_summary.json to output_dir.
+    The letter archive, if any, is only read: concurrent workers never write it.
+    """
+    inputs = find_petitions(source)
+    if not inputs:
+        print(f"❌ ERROR: No .pdf, .docx or .txt petitions found for {source}")
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = _report_paths(inputs, output_dir)
+    print(f"📦 Batch: {len(inputs)} petitions, {processes} processes, {llm_concurrency} concurrent LLM calls")
+
+    started = time.time()
+    llm_semaphore = multiprocessing.Semaphore(llm_concurrency)
+    results = []
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_batch_worker,
+                             initargs=(llm_semaphore,)) as executor:
+        futures = [executor.submit(_run_batch_item, i, o, letter_archive) for i, o in zip(inputs, outputs)]
+        for future in as_completed(futures):
+            result = future.result()
+            icon = "✅" if result["status"] == "ok" else "❌"
+            print(f"{icon} {result['input']} ({result['seconds']}s)")
+            results.append(result)
+
+    results.sort(key=lambda r: inputs.index(r["input"]))
+    summary = {
+        "source": source,
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "wall_seconds": round(time.time() - started, 2),
+        "petitions": results
+    }
+    summary_path = os.path.join(output_dir, "batch_summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print(f"📊 {summary['succeeded']}/{summary['total']} reports generated. Summary: {summary_path}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EB-1A petition RFE risk analyzer")
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="petition file (.pdf, .docx or .txt)")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="report path for a single petition")
+    parser.add_argument("--batch", metavar="DIR_OR_GLOB", help="analyze every petition in a directory or glob")
+    parser.add_argument("--output-dir", default="outputs", help="report directory for --batch")
+    parser.add_argument("--processes", type=int, default=max(1, min(4, os.cpu_count() or 1)),
+                        help="worker processes for --batch")
+    parser.add_argument("--llm-concurrency", type=int, default=LLM_CONCURRENCY,
+                        help="max Ollama requests in flight (across the whole batch with --batch)")
+    parser.add_argument("--letter-archive", metavar="PATH",
+                        help="MinHash index of previously filed letters to check new letters against")
+    parser.add_argument("--add-to-archive", action="store_true",
+                        help="add this petition's letters to --letter-archive after the run")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="stage timings and LLM call stats (default: <report>.metrics.json)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="also write a cProfile dump of the run (main thread only) to PATH")
+    parser.add_argument("--check", action="store_true",
+                        help="only validate the input files, output location and Ollama, then exit")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        if args.batch:
+            inputs = find_petitions(args.batch)
+            if not inputs:
+                print(f"❌ ERROR: No .pdf, .docx or .txt petitions found for {args.batch}")
+                raise SystemExit(1)
+            outputs = _report_paths(inputs, args.output_dir)
+        else:
+            inputs, outputs = [args.input], [args.output]
+        ok = run_checks(inputs, outputs)
+        print("✅ Ready to analyze." if ok else "❌ Fix the problems above before running.")
+        raise SystemExit(0 if ok else 1)
+
+    if args.batch:
+        run_batch(args.batch, args.output_dir, max(1, args.processes), max(1, args.llm_concurrency),
+                  letter_archive=args.letter_archive)
+        return
+
+    if not os.path.exists(args.input):
+        print(f"❌ ERROR: Petition file not found at {args.input}")
+        return
+
+    set_llm_semaphore(threading.BoundedSemaphore(max(1, args.llm_concurrency)))
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        analyze_petition(args.input, args.output, letter_archive=args.letter_archive,
+                         add_to_archive=args.add_to_archive, metrics_path=args.metrics)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"🔬 Profile saved to: {args.profile} (view with: python -m pstats {args.profile})")
+
+
 if __name__ == "__main__":
     main()
@@ -1,9 +1,13 @@
-import os, re, json, requests
+import os, re, json, hashlib, threading, requests
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import pdfplumber
 from dotenv import load_dotenv
-import praw 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
+from src.aao_store import AAOStore
 
 load_dotenv()
 HEADERS = {"User-Agent": "Mozilla/5.0 (EB1A-Scraper)"}
@@ -13,8 +17,17 @@ AAO_INDEX = f"{BASE_URL}/administrative-appeals/aao-decisions/aao-non-precedent-
 
 RAW_AAO_DIR = "knowledge_base/raw/aao"
 PROCESSED_DIR = "knowledge_base/processed"
-os.makedirs(RAW_AAO_DIR, exist_ok=True)
-os.makedirs(PROCESSED_DIR, exist_ok=True)
+
+# Downloads share one pooled session; failed requests are retried with backoff.
+# The manifest records ETag/Last-Modified and a hash per PDF so reruns resume
+# where they stopped and only re-fetch decisions that changed on the server.
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_BACKOFF = 0.5
+DOWNLOAD_TIMEOUT = 30
+DOWNLOAD_MANIFEST = os.path.join(RAW_AAO_DIR, "manifest.json")
+EXTRACT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+EXTRACT_PAGES = 5
 
 def clean(text): return re.sub(r"\s+", " ", text.strip())
 
@@ -43,42 +56,177 @@ def scrape_uscis_policy():
     print(f"...Extracted {len(sections)} USCIS policy sections.")
 
 # 2️⃣ AAO PDF download and extraction
-def scrape_aao_pdfs():
-    print("📄 Fetching AAO non-precedent decision links...")
-    r = requests.get(AAO_INDEX, headers=HEADERS, timeout=30)
-    soup = BeautifulSoup(r.text, "html.parser")
+def make_session(pool_size=DOWNLOAD_WORKERS, retries=DOWNLOAD_RETRIES, backoff=DOWNLOAD_BACKOFF):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET", "HEAD"))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def load_download_manifest(path=DOWNLOAD_MANIFEST):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable download manifest {path}: {e}")
+        return {}
+
+def save_download_manifest(manifest, path=DOWNLOAD_MANIFEST):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
 
+def find_aao_pdfs(session, index_url=AAO_INDEX):
+    r = session.get(index_url, timeout=DOWNLOAD_TIMEOUT)
+    r.raise_for_status()
+    soup = BeautifulSoup(r.text, "html.parser")
     pdfs = []
     for a in soup.select("a[href$='.pdf']"):
-        title = clean(a.get_text())
-        href = a['href']
-        full_url = href if href.startswith("http") else BASE_URL + href
-        pdfs.append((title, full_url))
-
-    decisions = []
-    for title, url in pdfs:
-        safe_fn = re.sub(r'[\\/*?:"<>|]',"_", title)
-        path = os.path.join(RAW_AAO_DIR, safe_fn + ".pdf")
-        if not os.path.exists(path):
-            print(" ↓ Downloading", title)
-            resp = requests.get(url, headers=HEADERS, timeout=30)
-            with open(path,"wb") as f:
-                f.write(resp.content)
-
-        text_snip = ""
+        pdfs.append((clean(a.get_text()), urljoin(index_url, a['href'])))
+    return pdfs
+
+def download_pdf(session, url, path, entry=None):
+    """
+    Fetch url into path, sending the stored validators so an unchanged file costs a 304.
+    The body is streamed to a temp file and renamed, so an interrupted download never
+    leaves a truncated PDF behind. Returns (status, manifest entry).
+    """
+    entry = dict(entry or {})
+    headers = {}
+    if os.path.exists(path):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True) as resp:
+        if resp.status_code == 304:
+            return "not modified", entry
+        resp.raise_for_status()
+        digest = hashlib.sha256()
+        tmp_path = f"{path}.{threading.get_ident()}.part"
         try:
-            with pdfplumber.open(path) as pdf:
-                text_snip = " ".join(p.extract_text() or "" for p in pdf.pages[:5])
-        except Exception as e:
-            print("⚠️ PDF read error:", title, e)
+            with open(tmp_path, "wb") as f:
+                for block in resp.iter_content(chunk_size=64 * 1024):
+                    f.write(block)
+                    digest.update(block)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        entry.update({
+            "path": path,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "sha256": digest.hexdigest()
+        })
+    return "downloaded", entry
+
+def pdf_filename(url):
+    """A file name that only this URL maps to: its basename plus a short hash of the full URL."""
+    stem = os.path.splitext(os.path.basename(urlparse(url).path))[0] or "decision"
+    stem = re.sub(r'[^\w.\-]', "_", stem)[:80]
+    return f"{stem}_{hashlib.sha256(url.encode('utf-8')).hexdigest()[:12]}.pdf"
+
+def download_aao_pdfs(pdfs, session=None, workers=DOWNLOAD_WORKERS, raw_dir=RAW_AAO_DIR, manifest_path=None):
+    """
+    Download (title, url) pairs concurrently. The manifest is saved after every
+    finished file, so an interrupted run resumes without repeating finished work.
+    Returns {url: manifest entry} for every PDF available on disk.
+    """
+    os.makedirs(raw_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(raw_dir, "manifest.json")
+    manifest = load_download_manifest(manifest_path)
+    session = session or make_session(workers)
+    counts = {"downloaded": 0, "not modified": 0, "failed": 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {}
+        queued = set()
+        for title, url in pdfs:
+            if url in queued:
+                continue
+            queued.add(url)
+            # Titles repeat ("Decision") and would have parallel downloads overwrite
+            # each other's file, so the file name comes from the URL.
+            path = os.path.join(raw_dir, pdf_filename(url))
+            futures[executor.submit(download_pdf, session, url, path, manifest.get(url))] = (title, url)
+        for future in as_completed(futures):
+            title, url = futures[future]
+            try:
+                status, entry = future.result()
+            except (requests.RequestException, OSError) as e:
+                print(f"⚠️ Download failed: {title}: {e}")
+                counts["failed"] += 1
+                continue
+            counts[status] += 1
+            if status == "downloaded":
+                print(" ↓ Downloaded", title)
+            entry["title"] = title
+            manifest[url] = entry
+            save_download_manifest(manifest, manifest_path)
+
+    print(f"...{counts['downloaded']} downloaded, {counts['not modified']} unchanged, {counts['failed']} failed.")
+    wanted = {url for _, url in pdfs}
+    return {url: entry for url, entry in manifest.items() if url in wanted and os.path.exists(entry.get("path", ""))}
+
+def extract_aao_text(path, pages=EXTRACT_PAGES):
+    with pdfplumber.open(path) as pdf:
+        return clean(" ".join(p.extract_text() or "" for p in pdf.pages[:pages]))
+
+def extract_aao_decisions(entries, store, workers=EXTRACT_WORKERS):
+    """
+    Bring the decision store up to date with the downloaded PDFs. Only PDFs whose hash
+    the store hasn't seen for that URL are parsed, on a process pool (pdfplumber is
+    CPU bound), so the work is proportional to what changed. Returns how many were stored.
+    """
+    pending = {}
+    stored = 0
+    for url, entry in entries.items():
+        if store.is_current(url, entry["sha256"]):
             continue
+        # The same PDF published under another URL: reuse its text.
+        same_pdf = store.get_by_hash(entry["sha256"])
+        if same_pdf:
+            store.put(url, entry["sha256"], entry["title"], same_pdf["text"])
+            stored += 1
+        else:
+            pending[url] = entry
 
-        decisions.append({"title": title, "url": url, "text_snippet": clean(text_snip)})
+    if pending:
+        print(f"🔎 Extracting text from {len(pending)} new or changed AAO decisions...")
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(extract_aao_text, entry["path"]): url for url, entry in pending.items()}
+            for future in as_completed(futures):
+                url = futures[future]
+                entry = pending[url]
+                try:
+                    store.put(url, entry["sha256"], entry["title"], future.result())
+                    stored += 1
+                except Exception as e:
+                    print("⚠️ PDF read error:", entry["title"], e)
+    return stored
 
-    with open(os.path.join(PROCESSED_DIR, "aao_decisions.json"), "w", encoding="utf-8") as f:
-        json.dump(decisions, f, indent=2, ensure_ascii=False)
+def scrape_aao_pdfs(index_url=AAO_INDEX, session=None, raw_dir=RAW_AAO_DIR, processed_dir=PROCESSED_DIR,
+                    download_workers=DOWNLOAD_WORKERS, extract_workers=EXTRACT_WORKERS):
+    print("📄 Fetching AAO non-precedent decision links...")
+    session = session or make_session(download_workers)
+    pdfs = find_aao_pdfs(session, index_url)
 
-    print(f"...Processed {len(decisions)} AAO decisions.")
+    entries = download_aao_pdfs(pdfs, session, download_workers, raw_dir, os.path.join(raw_dir, "manifest.json"))
+    store = AAOStore(os.path.join(processed_dir, "aao_decisions.sqlite3"))
+    try:
+        stored = extract_aao_decisions(entries, store, extract_workers)
+        print(f"...Stored {stored} new or changed AAO decisions ({len(store)} in total).")
+    finally:
+        store.close()
+    return stored
 
 
 def scrape_reddit_web():
@@ -126,9 +274,19 @@ def scrape_reddit_web():
 
 # 🧩 Main orchestrator
 def run_all():
+    # Created here rather than on import, so the pipeline can be imported and
+    # pointed at other directories (e.g. by benchmarks.bench_aao_download).
+    os.makedirs(RAW_AAO_DIR, exist_ok=True)
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
     scrape_uscis_policy()
     scrape_aao_pdfs()
     scrape_reddit_web()  # Uncomment when credentials are ready
+    update_knowledge_index()
+
+def update_knowledge_index():
+    from src.retrieval import KnowledgeIndex
+    print("📚 Updating the knowledge base search index...")
+    KnowledgeIndex().update()
 
 if __name__ == "__main__":
     run_all()
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Extracted AAO decision text, one row per decision URL. Rows carry the SHA-256 of
+# the PDF they were extracted from, so unchanged PDFs are never parsed again, and a
+# sequence number that grows with every write, so readers such as the retrieval
+# index can pick up only what changed since they last looked.
+AAO_STORE_PATH = os.path.join("knowledge_base", "processed", "aao_decisions.sqlite3")
+
+
+class AAOStore:
+    def __init__(self, path=AAO_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS decisions ("
+            " url TEXT PRIMARY KEY,"
+            " sha256 TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_decisions_sha256 ON decisions(sha256);"
+            "CREATE INDEX IF NOT EXISTS idx_decisions_seq ON decisions(seq);"
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM decisions WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def get_by_hash(self, sha256):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM decisions WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone()
+        return dict(row) if row else None
+
+    def is_current(self, url, sha256):
+        """True if url was already extracted from a PDF with this hash."""
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM decisions WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] == sha256
+
+    def put(self, url, sha256, title, text):
+        with self._lock:
+            seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM decisions").fetchone()[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO decisions (url, sha256, title, text, seq, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (url, sha256, title, text, seq, time.time())
+            )
+            self._conn.commit()
+        return seq
+
+    def last_seq(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM decisions").fetchone()[0]
+
+    def changed_since(self, seq):
+        """Decisions written after sequence number seq, oldest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM decisions WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+
+# Curated phrases that tend to draw an RFE when they stand in for evidence.
+# Extra phrases can be listed one per line in the file named by RISK_ANALYZER_BUZZWORDS.
+BUZZWORDS_PATH = os.path.join(os.path.dirname(__file__), "data", "buzzwords.json")
+EXTRA_BUZZWORDS_PATH = os.getenv("RISK_ANALYZER_BUZZWORDS", "")
+# Regulatory terms of art ("extraordinary ability", "critical role", ...). A petition
+# has to use them when it argues a criterion, so they are only flagged on request.
+TERMS_OF_ART_PATH = os.path.join(os.path.dirname(__file__), "data", "buzzwords_terms_of_art.json")
+FLAG_TERMS_OF_ART = os.getenv("RISK_ANALYZER_FLAG_TERMS_OF_ART", "") not in ("", "0")
+
+
+def load_phrases(path=BUZZWORDS_PATH, extra_path=None, terms_of_art=None):
+    with open(path, "r", encoding="utf-8") as f:
+        phrases = json.load(f)
+    if FLAG_TERMS_OF_ART if terms_of_art is None else terms_of_art:
+        with open(TERMS_OF_ART_PATH, "r", encoding="utf-8") as f:
+            phrases += json.load(f)
+    extra_path = EXTRA_BUZZWORDS_PATH if extra_path is None else extra_path
+    if extra_path and os.path.exists(extra_path):
+        with open(extra_path, "r", encoding="utf-8") as f:
+            phrases += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return phrases
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed phrase list. Matching is case-insensitive,
+    only whole words count, and one pass over the text finds every phrase, so the
+    cost is linear in the text length whatever the number of phrases.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = []
+        self._lengths = []
+        self._keys = set()
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase in phrases:
+            self._add(phrase)
+        self._build()
+
+    def _add(self, phrase):
+        key = " ".join(phrase.lower().split())
+        if not key or key in self._keys:
+            return
+        self._keys.add(key)
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self.phrases))
+        self.phrases.append(phrase.strip())
+        self._lengths.append(len(key))
+
+    def _build(self):
+        # Breadth-first: each node's failure link points at the longest proper
+        # suffix that is also a prefix, and inherits that node's outputs.
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    fail = self._fail[node]
+                    while fail and ch not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def finditer(self, text):
+        """
+        Yield (start, end, phrase) for every whole-word occurrence, including
+        overlapping ones. Runs of whitespace in the text match a single space.
+        """
+        # Collapse whitespace runs but remember where each kept character came from,
+        # so offsets point into the original text.
+        chars, positions = [], []
+        previous_space = False
+        for i, ch in enumerate(text):
+            if ch.isspace():
+                if previous_space:
+                    continue
+                previous_space = True
+                ch = " "
+            else:
+                previous_space = False
+            for lowered in ch.lower():
+                chars.append(lowered)
+                positions.append(i)
+
+        goto, fail, out, phrases, lengths = self._goto, self._fail, self._out, self.phrases, self._lengths
+        node = 0
+        for i, ch in enumerate(chars):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for phrase_id in out[node]:
+                first = i - lengths[phrase_id] + 1
+                start, end = positions[first], positions[i] + 1
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                    continue
+                yield start, end, phrases[phrase_id]
+
+    def find(self, text):
+        """
+        Non-overlapping matches in text order, preferring the longest phrase at
+        each position, as [{"phrase", "text", "start", "end"}].
+        """
+        matches = sorted(self.finditer(text), key=lambda m: (m[0], -(m[1] - m[0])))
+        hits, last_end = [], 0
+        for start, end, phrase in matches:
+            if start < last_end:
+                continue
+            hits.append({"phrase": phrase, "text": text[start:end], "start": start, "end": end})
+            last_end = end
+        return hits
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_buzzword_matcher():
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = PhraseMatcher(load_phrases())
+        return _matcher
+
+
+def find_buzzwords(text):
+    return get_buzzword_matcher().find(text)
+
+
+def merge_buzzwords(hits, llm_buzzwords):
+    """Phrases found locally, in text order, followed by any extra ones the LLM reported."""
+    merged, seen = [], set()
+    for phrase in [hit["phrase"] for hit in hits] + list(llm_buzzwords or []):
+        key = " ".join(str(phrase).lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(str(phrase).strip())
+    return merged
@@ -0,0 +1,190 @@
+import json
+import os
+import random
+import re
+import zlib
+
+
+# Word shingles of this length are hashed and summarised by NUM_PERM MinHash values.
+# The signature is split into LSH_BANDS bands; two letters become a candidate pair
+# when any band matches exactly, which catches pairs with Jaccard similarity above
+# roughly (1 / LSH_BANDS) ** (1 / rows_per_band) ~= 0.42 with high probability.
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+LSH_BANDS = 32
+MINHASH_SEED = 1
+
+# Coefficients stay below 2**31 and shingle hashes below 2**32, so a * h + b fits in
+# an unsigned 64-bit integer and the numpy path matches the pure-Python one exactly.
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_COEFF = (1 << 31) - 1
+_EMPTY_HASH = _MERSENNE_PRIME
+
+# numpy is imported on first use; most runs have no letters to compare.
+_np = False  # not looked up yet
+
+
+def _numpy():
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:  # pure-Python signatures are identical, just slower
+            numpy = None
+        _np = numpy
+    return _np
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Hash every run of `size` consecutive words into a stable 32-bit value."""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, seed=MINHASH_SEED):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [(rng.randint(1, _MAX_COEFF), rng.randint(0, _MAX_COEFF)) for _ in range(num_perm)]
+        np = _numpy()
+        if np is not None:
+            self._a = np.array([a for a, _ in self._perms], dtype=np.uint64)[:, None]
+            self._b = np.array([b for _, b in self._perms], dtype=np.uint64)[:, None]
+
+    def signature(self, shingle_hashes):
+        if not shingle_hashes:
+            return [_EMPTY_HASH] * self.num_perm
+        np = _numpy()
+        if np is not None:
+            hashes = np.fromiter(shingle_hashes, dtype=np.uint64, count=len(shingle_hashes))
+            values = (self._a * hashes[None, :] + self._b) % np.uint64(_MERSENNE_PRIME)
+            return [int(v) for v in values.min(axis=1)]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in shingle_hashes) for a, b in self._perms]
+
+
+class LetterIndex:
+    """
+    MinHash/LSH index of recommendation letters.
+    Candidate pairs come from shared LSH buckets and are verified with the exact
+    Jaccard similarity of their shingle sets, so only near-duplicates are compared.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=LSH_BANDS, seed=MINHASH_SEED, shingle_size=SHINGLE_SIZE):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        self.shingle_size = shingle_size
+        self._hasher = MinHasher(num_perm, seed)
+        self._shingles = {}
+        self._signatures = {}
+        self._buckets = [{} for _ in range(bands)]
+
+    def __len__(self):
+        return len(self._shingles)
+
+    def __contains__(self, letter_id):
+        return letter_id in self._shingles
+
+    def _band_keys(self, signature):
+        return [tuple(signature[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def _insert(self, letter_id, shingle_set, signature):
+        if letter_id in self._shingles:
+            self.remove(letter_id)
+        self._shingles[letter_id] = shingle_set
+        self._signatures[letter_id] = signature
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, set()).add(letter_id)
+
+    def add(self, letter_id, text):
+        shingle_set = shingles(text, self.shingle_size)
+        self._insert(letter_id, shingle_set, self._hasher.signature(shingle_set))
+
+    def remove(self, letter_id):
+        signature = self._signatures.pop(letter_id, None)
+        self._shingles.pop(letter_id, None)
+        if signature is None:
+            return
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            members = band.get(key)
+            if members:
+                members.discard(letter_id)
+                if not members:
+                    del band[key]
+
+    def query(self, text, threshold):
+        """Return [(letter_id, similarity)] for indexed letters at or above threshold."""
+        shingle_set = shingles(text, self.shingle_size)
+        signature = self._hasher.signature(shingle_set)
+        return self._verify(shingle_set, self._candidates(signature), threshold)
+
+    def _candidates(self, signature, exclude=None):
+        found = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            found |= band.get(key, set())
+        found.discard(exclude)
+        return found
+
+    def _verify(self, shingle_set, candidates, threshold):
+        matches = []
+        for letter_id in candidates:
+            sim = jaccard(shingle_set, self._shingles[letter_id])
+            if sim >= threshold:
+                matches.append((letter_id, sim))
+        return sorted(matches, key=lambda m: (-m[1], str(m[0])))
+
+    def similar_pairs(self, threshold):
+        """All indexed pairs at or above threshold, as (a, b, similarity) in insertion order."""
+        order = {letter_id: i for i, letter_id in enumerate(self._shingles)}
+        pairs = []
+        for letter_id, signature in self._signatures.items():
+            later = {c for c in self._candidates(signature, exclude=letter_id) if order[c] > order[letter_id]}
+            for other, sim in self._verify(self._shingles[letter_id], later, threshold):
+                pairs.append((letter_id, other, sim))
+        return sorted(pairs, key=lambda p: (order[p[0]], order[p[1]]))
+
+    def save(self, path):
+        data = {
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "seed": self.seed,
+            "shingle_size": self.shingle_size,
+            "letters": {
+                letter_id: {"signature": self._signatures[letter_id], "shingles": sorted(shingle_set)}
+                for letter_id, shingle_set in self._shingles.items()
+            }
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(data["num_perm"], data["bands"], data["seed"], data["shingle_size"])
+        for letter_id, entry in data["letters"].items():
+            index._insert(letter_id, set(entry["shingles"]), entry["signature"])
+        return index
+
+    @classmethod
+    def load_or_create(cls, path):
+        return cls.load(path) if os.path.exists(path) else cls()
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src import llm_client, metrics
+
+# Responses are stored in one SQLite file keyed by a hash of (model, messages, options).
+# Entries older than CACHE_TTL seconds are ignored, and the least recently used
+# entries are evicted once the stored responses exceed CACHE_MAX_BYTES.
+CACHE_PATH = os.getenv("RISK_ANALYZER_CACHE", os.path.join(".cache", "llm_responses.sqlite3"))
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_TTL = 30 * 24 * 3600
+CACHE_ENABLED = os.getenv("RISK_ANALYZER_NO_CACHE", "") == ""
+
+
+class ResponseCache:
+    """Content-addressed, size-bounded store of LLM responses."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Batch runs share the file across processes: WAL plus a generous busy timeout
+        # lets concurrent writers queue instead of failing with "database is locked".
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model, messages, options=None, format=None):
+        request = {"model": model, "messages": messages, "options": options or {}}
+        if format:
+            # Structured-output requests must not share entries with free-text ones.
+            request["format"] = format
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return content
+
+    def put(self, key, model, content):
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, size, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def cached_chat(model=None, messages=None, options=None, client=None, stream=False, validate=None, **kwargs):
+    """
+    Drop-in for ollama.chat that answers repeated prompts from the on-disk cache.
+    Misses go through the shared client in src.llm_client (default model and options,
+    keep-alive, retries, concurrency limit).
+    Only the message content is cached; a hit returns {"message": {...}} without metadata.
+    With stream=True this returns an iterator of chunks; a hit is a single chunk, and
+    a miss is cached once the stream ends. A stream the caller closes early holds a
+    partial answer and is not cached, unless validate accepts it.
+    validate, if given, is called with the answer text and decides whether it is
+    cached; rejected answers are still returned, and the prompt is asked again next time.
+    """
+    model = model or llm_client.LLM_MODEL
+    options = llm_client.chat_options(options)
+    if not CACHE_ENABLED:
+        if stream:
+            return llm_client.chat_stream(messages, model, options, client, **kwargs)
+        return llm_client.chat(messages, model, options, client, **kwargs)
+
+    cache = get_cache()
+    key = cache.make_key(model, messages, options, kwargs.get("format"))
+    content = cache.get(key)
+    if content is not None:
+        metrics.record_llm_call(model, cached=True, stream=stream)
+        hit = {"message": {"role": "assistant", "content": content}, "cached": True}
+        return iter([hit]) if stream else hit
+
+    def store(text, finished=True):
+        if validate(text) if validate is not None else finished:
+            cache.put(key, model, text)
+
+    if stream:
+        return llm_client.chat_stream(messages, model, options, client, on_done=store, **kwargs)
+
+    response = llm_client.chat(messages, model, options, client, **kwargs)
+    store(response["message"]["content"])
+    return response
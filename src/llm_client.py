@@ -0,0 +1,159 @@
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+from src import metrics
+
+# Every Mistral request in the process goes through the clients here. A client
+# is shared per timeout, so its HTTP connection pool is reused across requests.
+# The model, server and default options can be set through the environment.
+# The ollama package itself is imported on first use; it is slow to import.
+LLM_MODEL = os.getenv("RISK_ANALYZER_MODEL", "mistral")
+LLM_HOST = os.getenv("OLLAMA_HOST") or None  # None: the ollama client's default, localhost:11434
+# Default generation options as JSON, e.g. '{"temperature": 0.2, "num_ctx": 8192}'.
+# Options passed by a caller take precedence.
+LLM_OPTIONS = json.loads(os.getenv("RISK_ANALYZER_LLM_OPTIONS", "") or "{}")
+# Ollama unloads an idle model after 5 minutes by default, and reloading takes
+# seconds. Every request asks it to keep the model loaded this long after the request.
+LLM_KEEP_ALIVE = os.getenv("RISK_ANALYZER_KEEP_ALIVE", "30m")
+# Requests in flight at once across all threads (see set_llm_semaphore for batch runs).
+LLM_CONCURRENCY = int(os.getenv("RISK_ANALYZER_LLM_CONCURRENCY", "4"))
+# Seconds a request may take when the caller doesn't pass a timeout (parser,
+# final assessment); 0 waits forever. Section analysis passes its own.
+LLM_TIMEOUT = float(os.getenv("RISK_ANALYZER_LLM_TIMEOUT", "300")) or None
+LLM_POOL_CONNECTIONS = 16
+LLM_POOL_KEEPALIVE_S = 120
+
+# Transient failures are retried up to LLM_RETRIES times. The wait is "full jitter":
+# a random time up to LLM_BACKOFF * 2**attempt seconds, capped at LLM_BACKOFF_MAX.
+# A read timeout is the caller's deadline and is not retried.
+LLM_RETRIES = 3
+LLM_BACKOFF = 0.5
+LLM_BACKOFF_MAX = 8.0
+RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+_clients = {}
+_clients_lock = threading.Lock()
+_llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+
+def set_llm_semaphore(semaphore):
+    """Replace the request limit; batch runs install one multiprocessing semaphore shared by every worker."""
+    global _llm_slots
+    _llm_slots = semaphore
+
+
+def get_client(timeout=None):
+    """The shared ollama.Client for this request timeout (seconds; None means LLM_TIMEOUT)"""
+    if timeout is None:
+        timeout = LLM_TIMEOUT
+    with _clients_lock:
+        client = _clients.get(timeout)
+        if client is None:
+            import httpx
+            import ollama
+            limits = httpx.Limits(max_connections=LLM_POOL_CONNECTIONS,
+                                  max_keepalive_connections=LLM_POOL_CONNECTIONS,
+                                  keepalive_expiry=LLM_POOL_KEEPALIVE_S)
+            client = _clients[timeout] = ollama.Client(host=LLM_HOST, timeout=timeout, limits=limits)
+        return client
+
+
+def chat_options(options=None):
+    """LLM_OPTIONS overridden by the caller's options"""
+    if not LLM_OPTIONS:
+        return options
+    return {**LLM_OPTIONS, **(options or {})}
+
+
+def is_transient(error):
+    import httpx
+    import ollama
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code in RETRY_STATUS_CODES
+    if isinstance(error, httpx.ReadTimeout):
+        return False
+    # ollama raises the builtin ConnectionError when it can't connect at all;
+    # dropped keep-alive connections and connect timeouts surface from httpx.
+    return isinstance(error, (ConnectionError, httpx.TransportError))
+
+
+def backoff_delay(attempt):
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF * 2 ** attempt))
+
+
+def chat(messages, model=None, options=None, client=None, **kwargs):
+    """client.chat with the shared defaults, the concurrency limit and retries"""
+    client = client or get_client()
+    model = model or LLM_MODEL
+    kwargs.setdefault("keep_alive", LLM_KEEP_ALIVE)
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            with _llm_slots:
+                response = client.chat(model=model, messages=messages, options=chat_options(options), **kwargs)
+            break
+        except Exception as e:
+            if attempt >= LLM_RETRIES or not is_transient(e):
+                raise
+        # Wait without holding a slot, so other requests can go ahead.
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+    metrics.record_llm_call(model, response, time.perf_counter() - started, retries=attempt)
+    return response
+
+
+def chat_stream(messages, model=None, options=None, client=None, on_done=None, **kwargs):
+    """
+    Yield streamed chunks while holding an LLM slot. Closing the generator early
+    closes the HTTP response, which makes Ollama stop generating. on_done receives
+    the text streamed so far and whether the stream finished on its own (False
+    when it was closed early). Only failures before the first chunk are retried;
+    after that, text has been yielded.
+    """
+    client = client or get_client()
+    model = model or LLM_MODEL
+    kwargs.setdefault("keep_alive", LLM_KEEP_ALIVE)
+    content = []
+    final = None
+    started = time.perf_counter()
+    attempt = 0
+    slot = _llm_slots
+    while True:
+        slot.acquire()
+        try:
+            stream = client.chat(model=model, messages=messages, options=chat_options(options), stream=True, **kwargs)
+            first = next(stream, None)
+            break
+        except Exception as e:
+            slot.release()
+            if attempt >= LLM_RETRIES or not is_transient(e):
+                metrics.record_llm_call(model, None, time.perf_counter() - started, stream=True, chunks=0,
+                                        retries=attempt)
+                raise
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+    try:
+        for chunk in itertools.chain([first] if first is not None else [], stream):
+            content.append(chunk["message"]["content"])
+            if chunk.get("done"):
+                # Ollama puts token counts and durations on the last chunk only.
+                final = chunk
+            yield chunk
+    except GeneratorExit:
+        stream.close()
+        if on_done and content:
+            on_done("".join(content), False)
+        raise
+    else:
+        if on_done and content:
+            on_done("".join(content), True)
+    finally:
+        slot.release()
+        metrics.record_llm_call(model, final, time.perf_counter() - started, stream=True, chunks=len(content),
+                                retries=attempt)
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+
+# Bump when the analysis prompt or result shape changes so stale entries are not reused.
+MANIFEST_VERSION = 4
+
+
+def fingerprint(text):
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+def manifest_path_for(report_path):
+    """The manifest lives next to the report: outputs/report.docx -> outputs/report.manifest.json"""
+    return os.path.splitext(report_path)[0] + ".manifest.json"
+
+
+def load_manifest(path):
+    empty = {"version": MANIFEST_VERSION, "paragraphs": {}, "sections": {}}
+    if not os.path.exists(path):
+        return empty
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+        return empty
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty
+    return manifest
+
+
+def save_manifest(path, labeled_paragraphs, sections, analyzed_data):
+    analyzed_by_section = {entry["section"]: entry for entry in analyzed_data}
+    manifest = {
+        "version": MANIFEST_VERSION,
+        # Paragraphs without a label (the LLM failed on them) are left out and classified again next run.
+        "paragraphs": {fingerprint(para): key for para, key in labeled_paragraphs if key is not None},
+        "sections": {
+            name: {"hash": fingerprint(content), "analysis": analyzed_by_section[name]}
+            for name, content in sections.items()
+            if name in analyzed_by_section
+        }
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def reusable_analysis(manifest, section_name, content):
+    """Return the stored analyzed_data entry if the section text is unchanged, else None."""
+    stored = manifest.get("sections", {}).get(section_name)
+    if stored and stored.get("hash") == fingerprint(content):
+        return stored.get("analysis")
+    return None
@@ -0,0 +1,187 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Ollama reports durations in nanoseconds; these response fields are copied into
+# every LLM call record (converted to seconds where they are durations).
+OLLAMA_COUNT_FIELDS = ("prompt_eval_count", "eval_count")
+OLLAMA_DURATION_FIELDS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+
+
+def metrics_path_for(report_path):
+    """Metrics live next to the report: outputs/report.docx -> outputs/report.metrics.json"""
+    return os.path.splitext(report_path)[0] + ".metrics.json"
+
+
+class RunMetrics:
+    """
+    Timing spans and LLM call records for one petition run. Spans nest per thread;
+    LLM calls are attributed to the innermost span open on the calling thread.
+    """
+
+    def __init__(self, **info):
+        self.info = info
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.spans = []
+        self.llm_calls = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current_span(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        """Time the enclosed block. Yields attrs, so the block can add details to the record."""
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            ended = time.perf_counter()
+            stack.pop()
+            self._add_span(name, parent, started, ended - started, attrs)
+
+    def timed_iter(self, name, iterable):
+        """
+        Wrap a lazy iterable so only the time spent producing items is counted.
+        Useful when a producer (e.g. PDF page decoding) is interleaved with its consumer.
+        """
+        parent = self.current_span()
+        started = time.perf_counter()
+        busy = 0.0
+        items = 0
+        iterator = iter(iterable)
+        try:
+            while True:
+                t = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    busy += time.perf_counter() - t
+                    break
+                busy += time.perf_counter() - t
+                items += 1
+                yield item
+        finally:
+            self._add_span(name, parent, started, busy, {"items": items})
+
+    def _add_span(self, name, parent, started, duration, attrs):
+        record = {
+            "name": name,
+            "parent": parent,
+            "start_s": round(started - self._t0, 4),
+            "duration_s": round(duration, 4),
+            "thread": threading.current_thread().name
+        }
+        if attrs:
+            record["attrs"] = attrs
+        with self._lock:
+            self.spans.append(record)
+
+    def record_llm_call(self, model, response=None, elapsed=None, cached=False, stream=False, chunks=None,
+                        retries=0):
+        record = {
+            "model": model,
+            "span": self.current_span(),
+            "cached": cached,
+            "stream": stream,
+            "elapsed_s": round(elapsed, 4) if elapsed is not None else None
+        }
+        if chunks is not None:
+            record["chunks"] = chunks
+        if retries:
+            record["retries"] = retries
+        if response is not None and not cached:
+            for field in OLLAMA_COUNT_FIELDS:
+                if response.get(field) is not None:
+                    record[field] = response.get(field)
+            for field in OLLAMA_DURATION_FIELDS:
+                if response.get(field) is not None:
+                    record[field.replace("_duration", "_s")] = round(response.get(field) / 1e9, 4)
+        with self._lock:
+            self.llm_calls.append(record)
+
+    def summary(self):
+        with self._lock:
+            spans = list(self.spans)
+            calls = list(self.llm_calls)
+
+        stages = {}
+        for span in sorted(spans, key=lambda s: s["start_s"]):
+            stage = stages.setdefault(span["name"], {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stage["count"] += 1
+            stage["total_s"] = round(stage["total_s"] + span["duration_s"], 4)
+            stage["max_s"] = max(stage["max_s"], span["duration_s"])
+
+        def llm_totals(records):
+            return {
+                "calls": len(records),
+                "cached": sum(1 for r in records if r["cached"]),
+                "retries": sum(r.get("retries", 0) for r in records),
+                "prompt_tokens": sum(r.get("prompt_eval_count", 0) for r in records),
+                "completion_tokens": sum(r.get("eval_count", 0) for r in records),
+                "elapsed_s": round(sum(r["elapsed_s"] or 0 for r in records), 4),
+                "eval_s": round(sum(r.get("eval_s", 0) for r in records), 4),
+                "load_s": round(sum(r.get("load_s", 0) for r in records), 4)
+            }
+
+        by_span = {}
+        for record in calls:
+            by_span.setdefault(record["span"] or "(none)", []).append(record)
+
+        return {
+            "run": dict(self.info, started_at=self.started_at,
+                        wall_s=round(time.perf_counter() - self._t0, 4)),
+            "stages": stages,
+            "llm": dict(llm_totals(calls), by_span={name: llm_totals(records) for name, records in by_span.items()}),
+            "spans": spans,
+            "llm_calls": calls
+        }
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+# One recorder per process; start_run() replaces it at the beginning of each petition.
+_run = RunMetrics()
+
+
+def start_run(**info):
+    global _run
+    _run = RunMetrics(**info)
+    return _run
+
+
+def current_run():
+    return _run
+
+
+def span(name, **attrs):
+    return _run.span(name, **attrs)
+
+
+def timed_iter(name, iterable):
+    return _run.timed_iter(name, iterable)
+
+
+def record_llm_call(model, response=None, elapsed=None, cached=False, stream=False, chunks=None, retries=0):
+    _run.record_llm_call(model, response, elapsed, cached, stream, chunks, retries)
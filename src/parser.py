@@ -1,8 +1,106 @@
+import collections
+import importlib.util
+import itertools
 import os
 import re
-from docx import Document
-from PyPDF2 import PdfReader
-import ollama
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src import metrics
+from src.llm_cache import cached_chat
+from src.manifest import fingerprint
+from src.risk_detector import estimate_tokens
+from src.section_classifier import get_section_classifier, record_examples
+
+# The document libraries (PyMuPDF, PyPDF2, python-docx) are imported on first use,
+# so runs that never open that kind of file (and `main.py --check`) don't pay for them.
+_fitz = False  # not looked up yet
+
+def get_fitz():
+    """The PyMuPDF module, or None if it isn't installed"""
+    global _fitz
+    if _fitz is False:
+        try:
+            import pymupdf as fitz  # PyMuPDF >= 1.24
+        except ImportError:
+            try:
+                import fitz  # older PyMuPDF releases
+            except ImportError:
+                fitz = None
+        _fitz = fitz
+    return _fitz
+
+def _pymupdf_installed():
+    return any(importlib.util.find_spec(name) is not None for name in ("pymupdf", "fitz"))
+
+# PDF text backend: "pymupdf" when PyMuPDF is installed, otherwise "pypdf2".
+# Documents with at least PARALLEL_PAGE_THRESHOLD pages are split into
+# PAGES_PER_TASK page ranges and extracted on a process pool.
+PDF_BACKEND = os.getenv("RISK_ANALYZER_PDF_BACKEND", "pymupdf" if _pymupdf_installed() else "pypdf2")
+PARALLEL_PAGE_THRESHOLD = 100
+PAGES_PER_TASK = 25
+PDF_WORKERS = os.cpu_count() or 1
+# At most this many page ranges per worker are extracted ahead of the consumer.
+PDF_RANGES_IN_FLIGHT = 2
+
+# Unmatched paragraphs are sent to the LLM in numbered batches of up to this many
+# paragraphs and CLASSIFICATION_BATCH_TOKENS (estimated) tokens of paragraph text,
+# so a batch of long paragraphs still fits Mistral's context window with the
+# instructions and the answer. Up to CLASSIFICATION_WORKERS batches are in flight at once.
+CLASSIFICATION_BATCH_SIZE = 20
+CLASSIFICATION_BATCH_TOKENS = 1500
+CLASSIFICATION_WORKERS = 4
+
+CATEGORY_LABELS = [
+    "background",
+    "original_contributions",
+    "authorship",
+    "judging",
+    "critical_role",
+    "media_coverage",
+    "final_merits",
+    "statement_of_intent",
+    "recommendation_letters",
+    "other"
+]
+
+# A per-letter header ("Letter of Recommendation ...", "Exhibit 4: Support Letter") or a
+# salutation opens a recommendation letter; see iter_letters and letter_paragraphs.
+LETTER_HEADER = re.compile(
+    r"^(?:exhibit\s+[\w.\-]+\s*[:\-–]\s*)?"
+    r"(?:letters? of (?:recommendation|support|reference)|(?:recommendation|reference|support(?:ing)?|expert) letter)\b",
+    re.IGNORECASE
+)
+LETTER_SALUTATION = re.compile(r"^(?:dear\b|to whom it may concern)", re.IGNORECASE)
+
+# Regex table for segment_by_criteria, in priority order: the first pattern found wins.
+# Letter headers and salutations come first: "Dear Officer, I reviewed her papers..."
+# opens a letter even though it also mentions a criterion.
+PATTERN_TO_KEY = {
+    rf"{LETTER_HEADER.pattern}|{LETTER_SALUTATION.pattern}": "recommendation_letters",
+    r"summary of .*?achievements|biography|background|education|career overview": "background",
+    r"evidence of original.*?contribution|scientific contribution|developed.*?framework|novel work|patent": "original_contributions",
+    r"authorship of scholarly articles|published.*?(journal|conference|paper)|citations": "authorship",
+    r"judg(e|ing) the work|peer review|review(ed|er) for": "judging",
+    r"critical role|leading role|executive|director|organized|led the": "critical_role",
+    r"media coverage|featured in|press|interviewed by|news outlet": "media_coverage",
+    r"final merits|extraordinary ability|risen to the very top|kazarian": "final_merits",
+    r"statement .*?plans|intend.*?continue|future research|benefit.*?united states|contribute.*?US": "statement_of_intent",
+    r"recommendation letter|supporting letter|reference letter|this letter.*?recommend": "recommendation_letters"
+}
+
+# Compiled once at import. The patterns are plain ASCII, so matching them case-
+# sensitively against the lowercased paragraph gives the same answer as re.IGNORECASE
+# while letting the regex engine use its fast literal scanning (about 5x faster).
+# They are tried in table order, so the first pattern that matches still wins.
+_SEGMENT_REGEXES = [(re.compile(pattern.lower()), key) for pattern, key in PATTERN_TO_KEY.items()]
+
+
+def match_segment(paragraph):
+    """Return the segment key of the first PATTERN_TO_KEY entry found in paragraph, or None."""
+    lowered = paragraph.lower()
+    for regex, key in _SEGMENT_REGEXES:
+        if regex.search(lowered):
+            return key
+    return None
 
 
 def extract_text(file_path):
@@ -17,17 +115,128 @@ def extract_text(file_path):
         raise ValueError(f"Unsupported file type: {ext}")
 
 def extract_text_from_pdf(file_path):
-    reader = PdfReader(file_path)
-    return "\n".join(page.extract_text() or '' for page in reader.pages)
+    return "\n".join(iter_pdf_pages(file_path))
 
 def extract_text_from_docx(file_path):
-    doc = Document(file_path)
-    return "\n".join(para.text for para in doc.paragraphs)
+    return "\n".join(iter_docx_lines(file_path))
 
 def extract_text_from_txt(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         return f.read()
 
+def _pypdf2_page_count(file_path):
+    from PyPDF2 import PdfReader
+    return len(PdfReader(file_path).pages)
+
+def _pypdf2_pages(file_path, start, stop):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(file_path)
+    for i in range(start, stop):
+        yield reader.pages[i].extract_text() or ''
+
+def _pymupdf_page_count(file_path):
+    with get_fitz().open(file_path) as doc:
+        return doc.page_count
+
+def _pymupdf_pages(file_path, start, stop):
+    with get_fitz().open(file_path) as doc:
+        for i in range(start, stop):
+            yield doc[i].get_text()
+
+# name -> (page count function, page range generator)
+PDF_BACKENDS = {
+    "pypdf2": (_pypdf2_page_count, _pypdf2_pages),
+    "pymupdf": (_pymupdf_page_count, _pymupdf_pages),
+}
+
+def iter_pdf_pages(file_path, backend=None, workers=None):
+    """
+    Yield the text of each PDF page, in page order, as it is decoded.
+    Large documents are extracted in page ranges on a process pool; ranges are
+    yielded in order as soon as each one (and every range before it) is done, and
+    the next range is submitted as each one is taken, so only about
+    PDF_RANGES_IN_FLIGHT * workers ranges are held at a time.
+    """
+    backend = backend or PDF_BACKEND
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+    if backend == "pymupdf" and get_fitz() is None:
+        raise ValueError("PDF backend 'pymupdf' requires PyMuPDF (pip install PyMuPDF)")
+    page_count, extract_pages = PDF_BACKENDS[backend]
+    workers = PDF_WORKERS if workers is None else workers
+
+    total = page_count(file_path)
+    if workers <= 1 or total < PARALLEL_PAGE_THRESHOLD:
+        yield from extract_pages(file_path, 0, total)
+        return
+
+    ranges = iter([(start, min(start + PAGES_PER_TASK, total)) for start in range(0, total, PAGES_PER_TASK)])
+    workers = min(workers, -(-total // PAGES_PER_TASK))
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Keep only a few ranges ahead of the consumer, so extracted pages don't pile
+        # up in memory while the caller is slower than the pool (e.g. waiting on the LLM).
+        pending = collections.deque(
+            executor.submit(_extract_page_range, backend, file_path, start, stop)
+            for start, stop in itertools.islice(ranges, PDF_RANGES_IN_FLIGHT * workers)
+        )
+        while pending:
+            pages = pending.popleft().result()
+            for start, stop in itertools.islice(ranges, 1):
+                pending.append(executor.submit(_extract_page_range, backend, file_path, start, stop))
+            yield from pages
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def _extract_page_range(backend, file_path, start, stop):
+    return list(PDF_BACKENDS[backend][1](file_path, start, stop))
+
+def iter_docx_lines(file_path):
+    from docx import Document
+    doc = Document(file_path)
+    for para in doc.paragraphs:
+        yield para.text
+
+def iter_txt_lines(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield line.rstrip('\n')
+
+def iter_paragraphs(file_path):
+    """
+    Stream a document as blank-line separated paragraphs without building its full text.
+    Produces the same pieces as re.split(r"\n{2,}", extract_text(file_path)).
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.pdf':
+        chunks = iter_pdf_pages(file_path)
+    elif ext == '.docx':
+        chunks = iter_docx_lines(file_path)
+    elif ext == '.txt':
+        chunks = iter_txt_lines(file_path)
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+    return paragraphs_from_chunks(chunks)
+
+def paragraphs_from_chunks(chunks):
+    """
+    Join "\n"-separated chunks (pages, lines) and split on blank lines incrementally.
+    Only the trailing, possibly unfinished paragraph is held back between chunks.
+    """
+    pending = None
+    for chunk in chunks:
+        pending = chunk if pending is None else pending + "\n" + chunk
+        # Only cut at a blank-line run that text follows; a run at the very end may
+        # continue into the next chunk.
+        last_break = None
+        for last_break in re.finditer(r"\n{2,}(?=[^\n])", pending):
+            pass
+        if last_break is not None:
+            yield from re.split(r"\n{2,}", pending[:last_break.start()])
+            pending = pending[last_break.end():]
+    if pending is not None:
+        yield from re.split(r"\n{2,}", pending)
+
 def run_llm_classification(paragraph):
     prompt = f"""
 You are helping classify segments of a USCIS EB-1A petition.
@@ -49,63 +258,264 @@ Paragraph:
 
 Respond only with the category label. Do not include extra explanation.
 """
-    response = ollama.chat(model="mistral", messages=[{"role": "user", "content": prompt}])
+    # Only known labels are cached; anything else is asked again on the next run.
+    response = cached_chat(messages=[{"role": "user", "content": prompt}],
+                           validate=lambda text: text.strip().lower() in CATEGORY_LABELS)
     return response['message']['content'].strip().lower()
 
 
-def segment_by_criteria(text):
-    segments = {
-        "background": "",
-        "original_contributions": "",
-        "authorship": "",
-        "judging": "",
-        "critical_role": "",
-        "media_coverage": "",
-        "final_merits": "",
-        "statement_of_intent": "",
-        "recommendation_letters": "",
-        "other": ""
-    }
+def run_llm_batch_classification(paragraphs):
+    """
+    Classify several paragraphs with one prompt.
+    Returns {position in paragraphs: label} for every line the model answered
+    with a known label; anything missing or unrecognised is left out.
+    """
+    labels = "\n".join(f"- {label}" for label in CATEGORY_LABELS)
+    numbered = "\n\n".join(f"[{i}]\n\"\"\"{para}\"\"\"" for i, para in enumerate(paragraphs, 1))
+    prompt = f"""
+You are helping classify segments of a USCIS EB-1A petition.
 
-    pattern_to_key = {
-        r"summary of .*?achievements|biography|background|education|career overview": "background",
-        r"evidence of original.*?contribution|scientific contribution|developed.*?framework|novel work|patent": "original_contributions",
-        r"authorship of scholarly articles|published.*?(journal|conference|paper)|citations": "authorship",
-        r"judg(e|ing) the work|peer review|review(ed|er) for": "judging",
-        r"critical role|leading role|executive|director|organized|led the": "critical_role",
-        r"media coverage|featured in|press|interviewed by|news outlet": "media_coverage",
-        r"final merits|extraordinary ability|risen to the very top|kazarian": "final_merits",
-        r"statement .*?plans|intend.*?continue|future research|benefit.*?united states|contribute.*?US": "statement_of_intent",
-        r"recommendation letter|supporting letter|reference letter|this letter.*?recommend": "recommendation_letters"
-    }
+Below are {len(paragraphs)} numbered paragraphs. For each one, return the most appropriate category from the list:
+{labels}
+
+Paragraphs:
+{numbered}
+
+Respond with exactly one line per paragraph in the form "<number>: <category label>". Do not include extra explanation.
+"""
+    # Cache only answers that give every paragraph a known label; a paragraph left
+    # out here is asked again (batched, then alone) on the next run.
+    response = cached_chat(messages=[{"role": "user", "content": prompt}],
+                           validate=lambda text: len(_parse_batch_labels(text, len(paragraphs))) == len(paragraphs))
+    return _parse_batch_labels(response['message']['content'], len(paragraphs))
+
+
+def _parse_batch_labels(text, count):
+    labels = {}
+    for line in text.splitlines():
+        match = re.match(r"\s*\[?(\d+)\]?\s*[:.)\-]\s*([a-z_ ]+)", line.strip().lower())
+        if not match:
+            continue
+        position = int(match.group(1)) - 1
+        label = match.group(2).strip().replace(" ", "_")
+        if 0 <= position < count and label in CATEGORY_LABELS:
+            labels.setdefault(position, label)
+    return labels
+
+
+def _classify_batch(batch, use_classifier=False):
+    """
+    Label a list of (idx, paragraph) pairs. With use_classifier, the local classifier
+    (trained on the first batch that needs it) takes the paragraphs it is confident
+    about; the rest go to the LLM as one batch, falling back per paragraph for gaps.
+    LLM answers are recorded as training examples when learning is enabled. Paragraphs
+    the LLM fails on or answers with an unknown label get None, so they are retried next run.
+    """
+    with metrics.span("classify_batch", paragraphs=len(batch)) as attrs:
+        results = {}
+        classifier = get_section_classifier() if use_classifier else None
+        if classifier is not None:
+            remaining = []
+            for (idx, para), (label, confidence) in zip(batch, classifier.predict([para for _, para in batch])):
+                if confidence >= classifier.threshold:
+                    results[idx] = label
+                    print(f"🧮 Local classifier labeled paragraph #{idx+1} as: {label} ({confidence:.2f})")
+                else:
+                    remaining.append((idx, para))
+            batch = remaining
+        attrs["sent_to_llm"] = len(batch)
+        if not batch:
+            return results
 
-    paragraphs = re.split(r"\n{2,}", text)
+        try:
+            answered = run_llm_batch_classification([para for _, para in batch])
+        except Exception as e:
+            print(f"❌ LLM batch failed on paragraphs #{batch[0][0]+1}-#{batch[-1][0]+1}: {e}")
+            answered = {}
+
+        learned = []
+        for position, (idx, para) in enumerate(batch):
+            predicted_key = answered.get(position)
+            if predicted_key is None:
+                try:
+                    predicted_key = run_llm_classification(para)
+                except Exception as e:
+                    print(f"❌ LLM failed on paragraph #{idx+1}: {e}")
+                    predicted_key = None
+            if predicted_key in CATEGORY_LABELS:
+                learned.append((para, predicted_key))
+                print(f"🤖 LLM classified paragraph #{idx+1} as: {predicted_key}")
+            else:
+                predicted_key = None
+                print(f"⚠️ No label for paragraph #{idx+1}; treating it as other for this run")
+            results[idx] = predicted_key
+        record_examples(learned)
+        return results
+
+
+def classify_paragraphs(text, known_labels=None, batch_size=CLASSIFICATION_BATCH_SIZE, max_workers=CLASSIFICATION_WORKERS,
+                        use_classifier=True, batch_tokens=CLASSIFICATION_BATCH_TOKENS):
+    """
+    Label each paragraph with a segment key. text is either the full document text
+    or an iterable of paragraphs (e.g. iter_paragraphs); with an iterable, LLM
+    batches are submitted as soon as they fill, while later pages are still being read.
+    A batch is full at batch_size paragraphs or batch_tokens estimated tokens; a
+    paragraph over batch_tokens on its own gets a batch to itself.
+    known_labels maps paragraph fingerprints to labels from a previous run; those
+    paragraphs skip both the regex table and the LLM. With use_classifier, paragraphs
+    the regex table misses go to the local section classifier before the LLM; it is
+    only trained once such a paragraph turns up.
+    Returns [(paragraph, key), ...] in document order; key is None for paragraphs
+    the LLM could not label (group_segments files them under "other").
+    """
+    known_labels = known_labels or {}
+
+    paragraphs = re.split(r"\n{2,}", text) if isinstance(text, str) else text
+    batch_size = max(1, batch_size)
+    assigned = []
+    unmatched = []
+    unmatched_tokens = 0
+    futures = []
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
     for idx, para in enumerate(paragraphs):
         para_clean = para.strip()
         if not para_clean:
             continue
 
-        matched = False
-        for pattern, key in pattern_to_key.items():
-            if re.search(pattern, para_clean, re.IGNORECASE):
-                segments[key] += para_clean + "\n\n"
-                matched = True
-                break
+        key = known_labels.get(fingerprint(para_clean))
+        if key not in CATEGORY_LABELS:
+            key = match_segment(para_clean)
 
-        if not matched:
-            try:
-                predicted_key = run_llm_classification(para_clean)
-                if predicted_key not in segments:
-                    predicted_key = "other"
-                segments[predicted_key] += para_clean + "\n\n"
-                print(f"🤖 LLM classified paragraph #{idx+1} as: {predicted_key}")
-            except Exception as e:
-                print(f"❌ LLM failed on paragraph #{idx+1}: {e}")
-                segments["other"] += para_clean + "\n\n"
+        if key is None:
+            tokens = estimate_tokens(para_clean)
+            if unmatched and unmatched_tokens + tokens > batch_tokens:
+                futures.append(executor.submit(_classify_batch, unmatched, use_classifier))
+                unmatched, unmatched_tokens = [], 0
+            unmatched.append((idx, para_clean))
+            unmatched_tokens += tokens
+            if len(unmatched) == batch_size:
+                futures.append(executor.submit(_classify_batch, unmatched, use_classifier))
+                unmatched, unmatched_tokens = [], 0
+        assigned.append((idx, para_clean, key))
+
+    if unmatched:
+        futures.append(executor.submit(_classify_batch, unmatched, use_classifier))
+    llm_labels = {}
+    try:
+        for future in futures:
+            llm_labels.update(future.result())
+    finally:
+        executor.shutdown()
+    return [(para_clean, key or llm_labels.get(idx)) for idx, para_clean, key in assigned]
 
+
+def group_segments(labeled_paragraphs):
+    segments = {label: "" for label in CATEGORY_LABELS}
+    # Append in document order so bucket text reads the same as before batching.
+    for para_clean, key in labeled_paragraphs:
+        segments[key or "other"] += para_clean + "\n\n"
     return segments
 
 
+def segment_by_criteria(text, known_labels=None, batch_size=CLASSIFICATION_BATCH_SIZE, max_workers=CLASSIFICATION_WORKERS,
+                        use_classifier=True, batch_tokens=CLASSIFICATION_BATCH_TOKENS):
+    with metrics.span("segment"):
+        return group_segments(classify_paragraphs(text, known_labels, batch_size, max_workers, use_classifier,
+                                                  batch_tokens))
+
+
+LETTER_SIGN_OFF = re.compile(
+    r"^(?:sincerely|respectfully(?: yours| submitted)?|(?:best|kind|warm) regards|regards|"
+    r"yours (?:truly|sincerely|faithfully)|with (?:best|warm) regards)\b[ \t]*[,.]?",
+    re.IGNORECASE | re.MULTILINE
+)
+# Paragraphs this short right after a sign-off are treated as the signature block.
+SIGNATURE_BLOCK_MAX_WORDS = 25
+# letter_paragraphs: how far to look for the sign-off that closes a letter, and how
+# many short paragraphs after it can belong to the signature block.
+MAX_LETTER_PARAGRAPHS = 40
+SIGNATURE_BLOCK_MAX_PARAGRAPHS = 4
+
+
+def iter_letters(paragraphs):
+    """
+    Split a stream of recommendation-letter paragraphs into individual letters.
+    A per-letter header ("Letter of Recommendation ...", "Exhibit 4: Support Letter")
+    or a salutation ("Dear ...", "To Whom It May Concern") starts a new letter, and a
+    sign-off ("Sincerely,") plus its short signature block ends one. Yields each
+    letter's text as soon as its end is seen.
+    """
+    current = []
+    has_body = False
+    signed = False
+    for para in paragraphs:
+        para = para.strip()
+        if not para:
+            continue
+
+        is_header = bool(LETTER_HEADER.match(para))
+        starts_letter = is_header or (LETTER_SALUTATION.match(para) and has_body)
+        ends_letter = signed and len(para.split()) > SIGNATURE_BLOCK_MAX_WORDS
+        if current and (starts_letter or ends_letter):
+            yield "\n\n".join(current)
+            current, has_body, signed = [], False, False
+
+        current.append(para)
+        has_body = has_body or not is_header
+        signed = signed or bool(LETTER_SIGN_OFF.search(para))
+
+    if current:
+        yield "\n\n".join(current)
+
+
+def _starts_letter(para):
+    return bool(LETTER_HEADER.match(para) or LETTER_SALUTATION.match(para))
+
+
+def _letter_end(paragraphs, start):
+    """Index just past the signature block of the letter opened at start, or None if no sign-off follows."""
+    has_body = False
+    for i in range(start, min(len(paragraphs), start + MAX_LETTER_PARAGRAPHS)):
+        para = paragraphs[i]
+        if i > start and has_body and _starts_letter(para):
+            return None
+        has_body = has_body or not LETTER_HEADER.match(para)
+        if LETTER_SIGN_OFF.search(para):
+            end = i + 1
+            while (end < len(paragraphs) and end - i <= SIGNATURE_BLOCK_MAX_PARAGRAPHS
+                   and len(paragraphs[end].split()) <= SIGNATURE_BLOCK_MAX_WORDS and not _starts_letter(paragraphs[end])):
+                end += 1
+            return end
+    return None
+
+
+def letter_paragraphs(labeled_paragraphs):
+    """
+    The paragraphs of [(paragraph, key), ...] that belong to recommendation letters,
+    in document order, ready for split_recommendation_letters. Letter bodies read like
+    criterion evidence ("her papers have been cited ...") and are labeled as such, so
+    a letter is taken whole: from its header or salutation through its sign-off and
+    signature block, whatever its paragraphs are labeled. Other paragraphs labeled
+    recommendation_letters are kept too.
+    """
+    paragraphs = [para for para, _ in labeled_paragraphs]
+    keep = [key == "recommendation_letters" for _, key in labeled_paragraphs]
+    i = 0
+    while i < len(paragraphs):
+        end = _letter_end(paragraphs, i) if _starts_letter(paragraphs[i]) else None
+        if end is None:
+            i += 1
+            continue
+        keep[i:end] = [True] * (end - i)
+        i = end
+    return [para for para, kept in zip(paragraphs, keep) if kept]
+
+
+def split_recommendation_letters(paragraphs):
+    """Return {"recommendation_letter_<n>": text} for the letters found in paragraphs."""
+    return {f"recommendation_letter_{i}": letter for i, letter in enumerate(iter_letters(paragraphs), 1)}
+
+
 def classify_criteria(section_name):
     mapping = {
         "original_contributions": "Criterion 6: Original Contributions",
@@ -0,0 +1,114 @@
+import codecs
+import json
+import os
+import time
+
+from src.llm_client import LLM_HOST, LLM_MODEL
+
+# `main.py --check` runs these before any heavy module is imported: the checks use the
+# standard library only, so validating a batch and pinging Ollama takes a fraction of a second.
+OLLAMA_MODEL = LLM_MODEL
+OLLAMA_DEFAULT_PORT = 11434
+OLLAMA_CHECK_TIMEOUT = 2.0
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+# Leading bytes every valid file of the type starts with (.docx files are zip archives).
+FILE_SIGNATURES = {".pdf": b"%PDF-", ".docx": b"PK\x03\x04"}
+
+
+def ollama_base_url(host=None):
+    """OLLAMA_HOST as the ollama client reads it: scheme and port are optional."""
+    host = (host or LLM_HOST or "").strip() or f"127.0.0.1:{OLLAMA_DEFAULT_PORT}"
+    scheme, _, address = host.rpartition("://")
+    scheme = scheme or "http"
+    address = address.rstrip("/")
+    if address.startswith("0.0.0.0"):
+        # A server bound to every interface is reached on loopback
+        address = "127.0.0.1" + address[len("0.0.0.0"):]
+    if ":" not in address.rsplit("]", 1)[-1]:
+        address = f"{address}:{OLLAMA_DEFAULT_PORT}"
+    return f"{scheme}://{address}"
+
+
+def check_ollama(model=OLLAMA_MODEL, timeout=OLLAMA_CHECK_TIMEOUT, host=None):
+    """Returns (ok, message): whether the Ollama server answers and has the model pulled."""
+    from urllib.error import URLError
+    from urllib.request import urlopen
+
+    url = ollama_base_url(host)
+    started = time.perf_counter()
+    try:
+        with urlopen(f"{url}/api/tags", timeout=timeout) as response:
+            tags = json.load(response)
+    except (URLError, OSError, ValueError) as e:
+        reason = getattr(e, "reason", e)
+        return False, f"Ollama is not reachable at {url} ({reason}). Start it with: ollama serve"
+    elapsed = time.perf_counter() - started
+
+    names = [entry.get("name", "") for entry in tags.get("models", [])]
+    wanted = model if ":" in model else f"{model}:latest"
+    if model not in names and wanted not in names:
+        return False, f"Ollama at {url} does not have '{model}'. Pull it with: ollama pull {model}"
+    return True, f"Ollama at {url} has '{model}' ({elapsed * 1000:.0f} ms)"
+
+
+def check_petition(path):
+    """Returns a list of problems with a petition file; empty if it looks readable."""
+    if not os.path.exists(path):
+        return ["file not found"]
+    if not os.path.isfile(path):
+        return ["not a file"]
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        return [f"unsupported file type '{extension}' (expected .pdf, .docx or .txt)"]
+    try:
+        with open(path, "rb") as f:
+            head = f.read(64 * 1024)
+    except OSError as e:
+        return [f"cannot be read ({e.strerror})"]
+
+    if not head:
+        return ["file is empty"]
+    signature = FILE_SIGNATURES.get(extension)
+    if signature and not head.startswith(signature):
+        return [f"does not look like a {extension} file"]
+    if extension == ".txt":
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        except UnicodeDecodeError:
+            return ["is not UTF-8 text"]
+    return []
+
+
+def check_output_path(path):
+    """Returns a problem with writing path, or None. Missing directories will be created."""
+    directory = os.path.dirname(os.path.abspath(path))
+    while not os.path.isdir(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory or os.path.exists(directory):
+            return f"cannot create directory {directory}"
+        directory = parent
+    if not os.access(directory, os.W_OK | os.X_OK):
+        return f"directory {directory} is not writable"
+    return None
+
+
+def run_checks(inputs, outputs, model=OLLAMA_MODEL, check_llm=True):
+    """Validate petitions, report destinations and the LLM; print a line per problem. Returns True if all pass."""
+    ok = True
+    for path in inputs:
+        problems = check_petition(path)
+        if problems:
+            ok = False
+            print(f"❌ {path}: {'; '.join(problems)}")
+        else:
+            print(f"✅ {path}")
+
+    for problem in sorted({problem for problem in map(check_output_path, outputs) if problem}):
+        ok = False
+        print(f"❌ Output: {problem}")
+
+    if check_llm:
+        llm_ok, message = check_ollama(model)
+        ok = ok and llm_ok
+        print(f"{'✅' if llm_ok else '❌'} {message}")
+    return ok
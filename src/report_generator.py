@@ -2,11 +2,21 @@ from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from docx.oxml.shared import OxmlElement, qn
-from matplotlib import pyplot as plt
-import tempfile
+from io import BytesIO
+from lxml import etree
+from html import escape
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from textwrap import shorten
+import copy
+import threading
 import os
-import ollama
+from src import metrics
+from src.llm_cache import cached_chat
+from src.risk_detector import CHARS_PER_TOKEN
 from datetime import datetime
 import re
 
@@ -28,42 +38,115 @@ def clean_text(text):
 
 
 def run_local_llm(prompt: str) -> str:
-    response = ollama.chat(model="mistral", messages=[{"role": "user", "content": prompt}])
+    response = cached_chat(messages=[{"role": "user", "content": prompt}])
     return response['message']['content']
 
 
 def generate_report(sections, output_path, extra_notes=None):
-    doc = Document()
+    # The final assessment only needs the section results, so Mistral writes it while
+    # the document is assembled; the builder waits for it where it is inserted.
+    final_assessment = _start_final_assessment(sections, extra_notes)
     
-    # Set document margins and styles
-    _setup_document_styles(doc)
-    
-    # Title Page
-    _create_title_page(doc)
-    
-    # Table of Contents
-    _create_table_of_contents(doc, sections)
-    
-    # Executive Summary
-    _create_executive_summary(doc, sections)
+    with metrics.span("report.build"):
+        # Styles and title page come prebuilt from the per-process template
+        doc = _new_report_document()
+        
+        # Table of Contents
+        _create_table_of_contents(doc, sections)
+        
+        # Executive Summary
+        _create_executive_summary(doc, sections)
     
     # Section-by-Section Feedback
-    risk_scores = _create_section_analysis(doc, sections)
+    with metrics.span("report.sections", sections=len(sections)):
+        risk_scores = _create_section_analysis(doc, sections)
     
     # Risk Timeline Chart
-    _create_risk_chart_section(doc, risk_scores)
+    with metrics.span("report.chart"):
+        _create_risk_chart_section(doc, risk_scores)
     
     # Final LLM Risk Assessment
-    _create_final_assessment(doc, sections, extra_notes)
+    with metrics.span("report.final_assessment"):
+        _create_final_assessment(doc, final_assessment)
     
     # Appendix (if needed)
     _create_appendix(doc, extra_notes)
     
     # Save DOCX
-    doc.save(output_path)
+    with metrics.span("report.save"):
+        doc.save(output_path)
     print(f"Report generated successfully: {output_path}")
 
 
+# Every report starts from the same skeleton: custom styles plus the title page.
+# It is built once per process (on top of REPORT_TEMPLATE_PATH, if set, so a firm
+# can supply its own letterhead and styles) and each report opens a copy of the
+# serialized bytes. The constant closing paragraphs of the appendix are kept as
+# XML and deep-copied into each report.
+REPORT_TEMPLATE_PATH = os.getenv("RISK_ANALYZER_REPORT_TEMPLATE", "")
+REPORT_DATE_PLACEHOLDER = "{report_date}"
+
+_template = None
+_template_lock = threading.Lock()
+
+
+class _ReportTemplate:
+    def __init__(self, path=REPORT_TEMPLATE_PATH):
+        doc = Document(path or None)
+        _setup_document_styles(doc)
+        _create_title_page(doc, REPORT_DATE_PLACEHOLDER)
+        self.date_paragraph = len(doc.paragraphs) - 1
+        while REPORT_DATE_PLACEHOLDER not in doc.paragraphs[self.date_paragraph].text:
+            self.date_paragraph -= 1
+
+        # Resolve style names to the ids the bulk builders write into the XML
+        self.style_ids = {}
+        for name in ("Heading 1", "Heading 2", "Heading 3", "Risk Highlight", "Enhanced Quote", "Quote"):
+            try:
+                self.style_ids[name] = doc.styles[name].style_id
+            except KeyError:
+                pass
+
+        # Table properties and cell properties for the bulk-built TOC rows
+        prototype = doc.add_table(rows=1, cols=2)
+        prototype.style = 'Light List Accent 1'
+        tbl = prototype._tbl
+        self.toc_table_head = "".join(
+            etree.tostring(tbl.find(qn(tag)), encoding="unicode") for tag in ("w:tblPr", "w:tblGrid")
+        )
+        self.toc_cell_props = [
+            etree.tostring(cell._tc.find(qn("w:tcPr")), encoding="unicode") for cell in prototype.rows[0].cells
+        ]
+        tbl.getparent().remove(tbl)
+
+        buffer = BytesIO()
+        doc.save(buffer)
+        self.skeleton = buffer.getvalue()
+
+        body = doc.element.body
+        start = len(body) - 1  # everything after this is boilerplate (sectPr stays last)
+        _add_appendix_boilerplate(doc)
+        self.appendix_boilerplate = list(body)[start:-1]
+
+    def new_document(self):
+        doc = Document(BytesIO(self.skeleton))
+        date_run = doc.paragraphs[self.date_paragraph].runs[0]
+        date_run.text = date_run.text.replace(REPORT_DATE_PLACEHOLDER, datetime.now().strftime('%B %d, %Y'))
+        return doc
+
+
+def _get_report_template():
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = _ReportTemplate()
+        return _template
+
+
+def _new_report_document():
+    return _get_report_template().new_document()
+
+
 def _setup_document_styles(doc):
     """Set up custom styles for the document"""
     styles = doc.styles
@@ -99,7 +182,7 @@ def _setup_document_styles(doc):
         pass  # Style might already exist
 
 
-def _create_title_page(doc):
+def _create_title_page(doc, report_date=None):
     """Create professional title page"""
     # Main title
     title = doc.add_heading("EB-1A PETITION", 0)
@@ -127,7 +210,8 @@ def _create_title_page(doc):
     generator_run.font.italic = True
     
     # Date
-    date_info = doc.add_paragraph(f"Report Date: {datetime.now().strftime('%B %d, %Y')}")
+    report_date = report_date or datetime.now().strftime('%B %d, %Y')
+    date_info = doc.add_paragraph(f"Report Date: {report_date}")
     date_info.alignment = WD_ALIGN_PARAGRAPH.CENTER
     date_run = date_info.runs[0]
     date_run.font.size = Pt(12)
@@ -165,15 +249,15 @@ def _create_table_of_contents(doc, sections):
         ("Appendix", str(page_num + 2))
     ])
     
-    # Create TOC table
-    table = doc.add_table(rows=len(toc_items), cols=2)
-    table.style = 'Light List Accent 1'
-    
-    for i, (item, page) in enumerate(toc_items):
-        row = table.rows[i]
-        row.cells[0].text = item
-        row.cells[1].text = page
-        row.cells[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    # Create TOC table (built as one XML fragment; a row per section adds up)
+    template = _get_report_template()
+    item_props, page_props = template.toc_cell_props
+    rows = "".join(
+        f"<w:tr><w:tc>{item_props}{_paragraph_xml([_run_xml(item)])}</w:tc>"
+        f"<w:tc>{page_props}{_paragraph_xml([_run_xml(page)], align='right')}</w:tc></w:tr>"
+        for item, page in toc_items
+    )
+    _append_xml(doc, f"<w:tbl>{template.toc_table_head}{rows}</w:tbl>")
     
     # Instructions
     doc.add_paragraph("")
@@ -203,7 +287,7 @@ def _create_executive_summary(doc, sections):
     risk_counts = {"Low": 0, "Medium": 0, "High": 0, "Unknown": 0}
     for section in sections:
         # Extract risk from llm_feedback or default to Unknown
-        risk_level = _extract_risk_level(section.get('llm_feedback', ''))
+        risk_level = _section_risk_level(section)
         if risk_level in risk_counts:
             risk_counts[risk_level] += 1
         else:
@@ -255,68 +339,147 @@ def _create_section_analysis(doc, sections):
     """Create detailed section-by-section analysis"""
     doc.add_heading("Detailed Section Analysis", level=1)
     
+    styles = _get_report_template().style_ids
+    heading2, heading3 = styles.get("Heading 2"), styles.get("Heading 3")
+    quote_style = styles.get("Enhanced Quote", styles.get("Quote"))
+    
     risk_scores = {}
+    parts = []
     
     for i, entry in enumerate(sections, 1):
         # Section header with numbering
-        section_title = f"{i}. {entry['criteria']}"
-        doc.add_heading(section_title, level=2)
+        parts.append(_paragraph_xml([_run_xml(f"{i}. {entry['criteria']}")], heading2))
         
         # Extract risk level from LLM feedback or set default
-        risk_level = _extract_risk_level(entry.get('llm_feedback', ''))
+        risk_level = _section_risk_level(entry)
         risk_indicator = {
             'Low': '🟢 LOW RISK',
             'Medium': '🟡 MEDIUM RISK',
             'High': '🔴 HIGH RISK'
         }.get(risk_level, '⚪ UNKNOWN RISK')
-        
-        risk_para = doc.add_paragraph(f"Risk Assessment: {risk_indicator}")
-        risk_para.style = 'Risk Highlight'
+        parts.append(_paragraph_xml([_run_xml(f"Risk Assessment: {risk_indicator}")], styles.get("Risk Highlight")))
         
         # Original excerpt in styled box
-        doc.add_heading("Original Text Excerpt:", level=3)
-        excerpt_para = doc.add_paragraph(f'"{clean_text(entry.get("excerpt", "No excerpt provided"))}"')
-        try:
-            excerpt_para.style = 'Enhanced Quote'
-        except:
-            excerpt_para.style = 'Quote'
+        parts.append(_paragraph_xml([_run_xml("Original Text Excerpt:")], heading3))
+        excerpt_runs = [
+            _run_xml(text, bold=flagged, highlight="yellow" if flagged else None)
+            for text, flagged in _excerpt_fragments(entry)
+        ]
+        parts.append(_paragraph_xml(excerpt_runs, quote_style))
         
         # LLM Analysis (if available)
         if entry.get('llm_feedback'):
-            doc.add_heading("AI Analysis:", level=3)
-            llm_text = clean_text(entry.get('llm_feedback', 'No analysis provided'))
-            doc.add_paragraph(llm_text)
+            parts.append(_paragraph_xml([_run_xml("AI Analysis:")], heading3))
+            parts.append(_paragraph_xml([_run_xml(clean_text(entry['llm_feedback']))]))
         
         # Reviewer comments
-        doc.add_heading("USCIS-Style Review Comments:", level=3)
+        parts.append(_paragraph_xml([_run_xml("USCIS-Style Review Comments:")], heading3))
         reviewer_text = clean_text(entry.get('reviewer_voice', 'No comments provided'))
-        doc.add_paragraph(reviewer_text)
+        parts.append(_paragraph_xml([_run_xml(reviewer_text)]))
         
         # Suggested improvements
-        doc.add_heading("Recommended Improvements:", level=3)
+        parts.append(_paragraph_xml([_run_xml("Recommended Improvements:")], heading3))
         suggested_text = clean_text(entry.get('suggested_language', 'No suggestions provided'))
-        improvement_para = doc.add_paragraph(suggested_text)
-        improvement_para.runs[0].font.color.rgb = RGBColor(0, 100, 0)
+        parts.append(_paragraph_xml([_run_xml(suggested_text, color="006400")]))
         
         # Flagged buzzwords if any
         if entry.get('buzzwords'):
-            doc.add_heading("⚠️ Flagged Terms:", level=3)
-            buzzword_para = doc.add_paragraph("The following terms may trigger additional scrutiny: ")
-            buzzword_run = buzzword_para.add_run(", ".join(entry['buzzwords']))
-            buzzword_run.font.bold = True
-            buzzword_run.font.color.rgb = RGBColor(200, 0, 0)
+            parts.append(_paragraph_xml([_run_xml("⚠️ Flagged Terms:")], heading3))
+            parts.append(_paragraph_xml([
+                _run_xml("The following terms may trigger additional scrutiny: "),
+                _run_xml(", ".join(entry['buzzwords']), bold=True, color="C80000")
+            ]))
         
         risk_scores[entry['criteria']] = risk_level
         
         # Add separator line
-        doc.add_paragraph("─" * 50).alignment = WD_ALIGN_PARAGRAPH.CENTER
+        parts.append(_paragraph_xml([_run_xml("─" * 50)], align="center"))
         
         if i < len(sections):  # Don't add page break after last section
-            doc.add_page_break()
+            parts.append(PAGE_BREAK_XML)
     
+    _append_xml(doc, "".join(parts))
     return risk_scores
 
 
+# main.py quotes the first EXCERPT_CHARS characters of a section, then "..."
+EXCERPT_CHARS = 300
+
+
+def _excerpt_fragments(entry):
+    """The quoted excerpt as (text, flagged) pieces, with flagged buzzwords split out"""
+    excerpt = entry.get("excerpt", "No excerpt provided")
+    # A hit running into the "..." was cut off by the excerpt, so it is not highlighted
+    quoted = min(len(excerpt), EXCERPT_CHARS)
+    hits = [hit for hit in entry.get("buzzword_hits", []) if hit["end"] <= quoted]
+    if not hits:
+        return [(f'"{clean_text(excerpt)}"', False)]
+
+    fragments = [('"', False)]
+    position = 0
+    for hit in hits:
+        fragments.append((_clean_fragment(excerpt[position:hit["start"]], position == 0), False))
+        fragments.append((_clean_fragment(excerpt[hit["start"]:hit["end"]]), True))
+        position = hit["end"]
+    fragments.append((_clean_fragment(excerpt[position:], position == 0).rstrip() + '"', False))
+    return fragments
+
+
+# Raw WordprocessingML for the bulk builders. Going through python-docx for every
+# paragraph and run costs a style lookup and several element insertions each; a
+# report section is instead rendered as one string and parsed once.
+PAGE_BREAK_XML = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def _run_xml(text, bold=False, color=None, highlight=None):
+    props = ""
+    if bold:
+        props += "<w:b/>"
+    if color:
+        props += f'<w:color w:val="{color}"/>'
+    if highlight:
+        props += f'<w:highlight w:val="{highlight}"/>'
+    if props:
+        props = f"<w:rPr>{props}</w:rPr>"
+    if not text:
+        return f"<w:r>{props}</w:r>" if props else ""
+    return f'<w:r>{props}<w:t xml:space="preserve">{escape(text, quote=False)}</w:t></w:r>'
+
+
+def _paragraph_xml(runs, style_id=None, align=None):
+    props = ""
+    if style_id:
+        props += f'<w:pStyle w:val="{style_id}"/>'
+    if align:
+        props += f'<w:jc w:val="{align}"/>'
+    if props:
+        props = f"<w:pPr>{props}</w:pPr>"
+    return f"<w:p>{props}{''.join(runs)}</w:p>"
+
+
+def _parse_xml_fragment(fragment):
+    return list(parse_xml(f"<w:body {nsdecls('w')}>{fragment}</w:body>"))
+
+
+def _append_xml(doc, fragment):
+    """Parse body-level WordprocessingML once and append it before the section properties"""
+    body = doc.element.body
+    sect_pr = body.sectPr
+    for element in _parse_xml_fragment(fragment):
+        if sect_pr is not None:
+            sect_pr.addprevious(element)
+        else:
+            body.append(element)
+
+
+def _clean_fragment(text, strip_start=False):
+    """clean_text for a piece of a longer run: keeps the single spaces at its edges"""
+    cleaned = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', text)
+    cleaned = re.sub(r'\s+', ' ', cleaned)
+    cleaned = cleaned.encode('utf-8', errors='ignore').decode('utf-8')
+    return cleaned.lstrip() if strip_start else cleaned
+
+
 def _create_risk_chart_section(doc, risk_scores):
     """Create risk visualization section"""
     doc.add_heading("Risk Analysis Visualization", level=1)
@@ -327,16 +490,36 @@ def _create_risk_chart_section(doc, risk_scores):
     )
     
     try:
-        chart_path = _plot_risk_chart(risk_scores)
-        doc.add_picture(chart_path, width=Inches(6.5))
-        os.remove(chart_path)
+        if CHART_STYLE == "table" or len(risk_scores) > CHART_MAX_BARS:
+            _add_risk_table_chart(doc, risk_scores)
+        else:
+            try:
+                chart_png = _plot_risk_chart(risk_scores)
+            except ImportError:
+                print("⚠️ matplotlib is not installed; drawing the risk chart as a table.")
+                _add_risk_table_chart(doc, risk_scores)
+            else:
+                doc.add_picture(chart_png, width=Inches(6.5))
     except Exception as e:
         doc.add_paragraph(f"Chart generation failed: {str(e)}")
     
     doc.add_page_break()
 
 
-def _create_final_assessment(doc, sections, extra_notes):
+def _start_final_assessment(sections, extra_notes):
+    """Run the final assessment on a background thread; returns its Future"""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="final-assessment")
+    future = executor.submit(_run_final_assessment, sections, extra_notes)
+    executor.shutdown(wait=False)
+    return future
+
+
+def _run_final_assessment(sections, extra_notes):
+    with metrics.span("final_assessment.llm"):
+        return run_local_llm(_build_final_prompt(sections, extra_notes))
+
+
+def _create_final_assessment(doc, final_assessment):
     """Create final LLM-generated assessment"""
     doc.add_heading("Final Reviewer Assessment", level=1)
     
@@ -346,8 +529,7 @@ def _create_final_assessment(doc, sections, extra_notes):
     )
     
     try:
-        final_prompt = _build_final_prompt(sections, extra_notes)
-        final_summary = run_local_llm(final_prompt)
+        final_summary = final_assessment.result()
         
         # Add the LLM response in a styled format
         assessment_para = doc.add_paragraph(clean_text(final_summary.strip()))
@@ -373,6 +555,14 @@ def _create_appendix(doc, extra_notes):
             fields_text = ", ".join(extra_notes['conflicting_fields'])
             doc.add_paragraph(f"Multiple expertise fields identified: {fields_text}. Ensure petition maintains consistent narrative focus.")
     
+    # Methodology note and footer are the same in every report
+    sect_pr = doc.element.body.sectPr
+    for element in _get_report_template().appendix_boilerplate:
+        sect_pr.addprevious(copy.deepcopy(element))
+
+
+def _add_appendix_boilerplate(doc):
+    """Closing paragraphs of the appendix; rendered once into the report template"""
     # Add methodology note
     doc.add_heading("Methodology Note", level=2)
     doc.add_paragraph(
@@ -389,48 +579,97 @@ def _create_appendix(doc, extra_notes):
     footer_para.runs[0].font.color.rgb = RGBColor(128, 128, 128)
 
 
+# The risk chart is either a matplotlib bar chart embedded as a PNG ("image") or a
+# native Word table with one colored bar per section ("table"), which needs no
+# matplotlib. Reports with more than CHART_MAX_BARS sections always get the table:
+# a bar chart that tall no longer fits on a page.
+CHART_STYLE = os.getenv("RISK_ANALYZER_CHART", "image")
+CHART_MAX_BARS = 60
+# The 12-inch-wide figure is placed 6.5 inches wide, so 150 DPI prints at ~280 DPI.
+CHART_DPI = 150
+CHART_COLORS = {1: ("LOW", "008000"), 2: ("MED", "FFA500"), 3: ("HIGH", "FF0000")}
+RISK_VALUES = {"Low": 1, "Medium": 2, "High": 3}
+
+
 def _plot_risk_chart(risk_dict):
-    """Create enhanced risk visualization"""
-    levels = {"Low": 1, "Medium": 2, "High": 3}
+    """Create enhanced risk visualization, returned as an in-memory PNG"""
+    # Imported on first use: matplotlib is slow to import and table charts don't need it.
+    # Figure + the Agg canvas avoids pyplot's global state, so reports can render concurrently.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
     items = list(risk_dict.items())
     labels = [i[0] for i in items]
-    values = [levels.get(i[1], 0) for i in items]
+    values = [RISK_VALUES.get(i[1], 0) for i in items]
     
     # Create color mapping
     colors = ['green' if v == 1 else 'orange' if v == 2 else 'red' for v in values]
     
-    plt.figure(figsize=(12, max(6, len(labels) * 0.5)))
-    bars = plt.barh(labels, values, color=colors, alpha=0.7)
+    fig = Figure(figsize=(12, max(6, len(labels) * 0.5)))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    bars = ax.barh(labels, values, color=colors, alpha=0.7)
     
     # Enhance chart appearance
-    plt.title("EB-1A Petition Risk Analysis by Section", fontsize=14, fontweight='bold', pad=20)
-    plt.xlabel("Risk Level", fontsize=12)
-    plt.xlim(0, 4)
-    plt.xticks([1, 2, 3], ['Low\n(1)', 'Medium\n(2)', 'High\n(3)'])
+    ax.set_title("EB-1A Petition Risk Analysis by Section", fontsize=14, fontweight='bold', pad=20)
+    ax.set_xlabel("Risk Level", fontsize=12)
+    ax.set_xlim(0, 4)
+    ax.set_xticks([1, 2, 3])
+    ax.set_xticklabels(['Low\n(1)', 'Medium\n(2)', 'High\n(3)'])
     
     # Add value labels on bars
     for bar, value in zip(bars, values):
         width = bar.get_width()
         risk_text = {1: 'LOW', 2: 'MED', 3: 'HIGH'}.get(value, '')
-        plt.text(width/2, bar.get_y() + bar.get_height()/2, 
+        ax.text(width/2, bar.get_y() + bar.get_height()/2, 
                 risk_text, ha='center', va='center', fontweight='bold', color='white')
     
     # Improve layout
-    plt.tight_layout()
-    plt.gca().invert_yaxis()  # Top to bottom ordering
-    
-    # Save to temporary file
-    tmpfile = tempfile.mktemp(suffix=".png")
-    plt.savefig(tmpfile, dpi=300, bbox_inches='tight')
-    plt.close()
-    return tmpfile
+    fig.tight_layout()
+    ax.invert_yaxis()  # Top to bottom ordering
+    
+    chart_png = BytesIO()
+    fig.savefig(chart_png, format="png", dpi=CHART_DPI, bbox_inches='tight')
+    chart_png.seek(0)
+    return chart_png
+
+
+def _add_risk_table_chart(doc, risk_dict):
+    """Risk chart as a Word table: section, level, and a bar of colored blocks"""
+    table = doc.add_table(rows=1, cols=3)
+    table.style = 'Light Grid Accent 1'
+    header = table.rows[0].cells
+    for cell, text in zip(header, ("Section", "Risk Level", "")):
+        cell.text = text
+    cell_props = [etree.tostring(cell._tc.tcPr, encoding="unicode") for cell in header]
+    
+    rows = []
+    for label, risk in risk_dict.items():
+        value = RISK_VALUES.get(risk, 0)
+        level, color = CHART_COLORS.get(value, ("UNKNOWN", "808080"))
+        cells = (
+            _paragraph_xml([_run_xml(label)]),
+            _paragraph_xml([_run_xml(level, bold=True, color=color)]),
+            _paragraph_xml([_run_xml("█" * (4 * value), color=color)])
+        )
+        rows.append("<w:tr>" + "".join(f"<w:tc>{props}{cell}</w:tc>" for props, cell in zip(cell_props, cells)) + "</w:tr>")
+    table._tbl.extend(_parse_xml_fragment("".join(rows)))
+
+
+# The final prompt carries a digest of every section's findings, capped at
+# FINAL_DIGEST_TOKEN_BUDGET estimated tokens (plus one closing line). Each section
+# gets a header line and up to FINAL_DIGEST_BULLETS findings; findings are added
+# round-robin, riskiest sections first, so a long petition can't crowd out the
+# sections that matter. Sections that don't fit at all are counted by risk level.
+FINAL_DIGEST_TOKEN_BUDGET = 1500
+FINAL_DIGEST_BULLETS = 3
+FINAL_DIGEST_BULLET_CHARS = 200
+DIGEST_RISK_ORDER = {"High": 0, "Medium": 1, "Unknown": 2, "Low": 3}
 
 
 def _build_final_prompt(section_data, notes):
     """Enhanced prompt for final assessment"""
-    bullets = "\n".join([
-        f"- {item['criteria']}: {_extract_risk_level(item.get('llm_feedback', ''))}" for item in section_data
-    ])
+    digest = build_section_digest(section_data)
     note_summary = ""
     if notes:
         if notes.get("similar_letters"):
@@ -447,8 +686,8 @@ Based on the detailed analysis below, provide a professional assessment that add
 3. Strategic recommendations for strengthening the case
 4. Timeline considerations and next steps
 
-Risk Assessment Summary:
-{bullets}
+Risk Assessment Summary (each criterion with its risk level and the main findings of the section review):
+{digest}
 
 Additional Red Flags:{note_summary}
 
@@ -456,6 +695,64 @@ Provide your assessment in a professional, structured format suitable for legal
 """
 
 
+def build_section_digest(section_data, token_budget=FINAL_DIGEST_TOKEN_BUDGET):
+    """Compact, size-bounded summary of each section's risk level and top findings"""
+    sections = []
+    for i, item in enumerate(section_data):
+        level = _section_risk_level(item)
+        findings = [f"  • {finding}" for finding in _section_findings(item)]
+        sections.append((i, f"- {item['criteria']} [{level}]", level, findings))
+    by_priority = sorted(sections, key=lambda s: (DIGEST_RISK_ORDER.get(s[2], 2), s[0]))
+    
+    # Sizes are counted in characters (newline included) against the token budget
+    budget = token_budget * CHARS_PER_TOKEN
+    used = 0
+    included = {}
+    # First round: each section's header with its top finding; later rounds add findings
+    for i, header, _, findings in by_priority:
+        lines = [header] + findings[:1]
+        cost = sum(len(line) + 1 for line in lines)
+        if used + cost > budget:
+            break
+        used += cost
+        included[i] = lines
+    
+    for depth in range(1, FINAL_DIGEST_BULLETS):
+        for i, _, _, findings in by_priority:
+            if i not in included or depth >= len(findings):
+                continue
+            cost = len(findings[depth]) + 1
+            if used + cost <= budget:
+                included[i].append(findings[depth])
+                used += cost
+    
+    lines = [line for i, _, _, _ in sections if i in included for line in included[i]]
+    omitted = Counter(level for i, _, level, _ in sections if i not in included)
+    if omitted:
+        counts = ", ".join(f"{omitted[level]} {level}" for level in DIGEST_RISK_ORDER if omitted[level])
+        lines.append(f"- ...and {sum(omitted.values())} more sections ({counts})")
+    return "\n".join(lines)
+
+
+def _section_findings(entry):
+    """Top risk bullets of a section's analysis, shortened for the digest"""
+    feedback = entry.get('llm_feedback') or ''
+    if feedback.lstrip().startswith('⚠️'):
+        return []  # the analysis failed; the text is an error message
+    findings = re.findall(r'^\s*(?:[-•*]|\d+[.)])\s+(.+)$', feedback, re.MULTILINE)
+    if not findings and feedback.strip():
+        findings = [feedback]
+    findings = [clean_text(finding) for finding in findings[:FINAL_DIGEST_BULLETS]]
+    return [shorten(finding, FINAL_DIGEST_BULLET_CHARS, placeholder="…") for finding in findings if finding]
+
+
+def _section_risk_level(entry):
+    """Use the risk level the LLM reported explicitly, else infer it from the feedback text"""
+    if entry.get('risk_level') in ("Low", "Medium", "High"):
+        return entry['risk_level']
+    return _extract_risk_level(entry.get('llm_feedback', ''))
+
+
 def _extract_risk_level(llm_feedback):
     """Extract risk level from LLM feedback text"""
     if not llm_feedback:
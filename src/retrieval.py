@@ -0,0 +1,324 @@
+import contextlib
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+from src.aao_store import AAOStore
+
+# BM25 index over the scraper's output. Passages, postings and per-file signatures
+# live in one SQLite file, so opening the index is cheap and re-indexing only
+# touches passages whose source file changed.
+KNOWLEDGE_BASE_DIR = os.path.join("knowledge_base", "processed")
+INDEX_PATH = os.getenv("RISK_ANALYZER_KB_INDEX", os.path.join(".cache", "knowledge_index.sqlite3"))
+RETRIEVAL_TOP_K = 3
+RETRIEVAL_SOURCES = ("policy", "aao")
+
+# Long policy sections and decision texts are indexed as passages of about this many words.
+PASSAGE_WORDS = 150
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    "a an and are as at be been by for from has have in is it its of on or that the this "
+    "to was were which with not but if their they such any other may must should".split()
+)
+
+
+def tokenize(text):
+    return [w for w in re.findall(r"[a-z0-9]+", text.lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+def split_passages(text, words_per_passage=PASSAGE_WORDS):
+    words = text.split()
+    return [" ".join(words[i:i + words_per_passage]) for i in range(0, len(words), words_per_passage)]
+
+
+def _policy_documents(data):
+    for heading, body in data.items():
+        for n, passage in enumerate(split_passages(body)):
+            yield f"{heading}#{n}", heading, passage
+
+
+def _reddit_documents(data):
+    for post in data:
+        text = f"{post.get('title', '')} {post.get('text', '')}".strip()
+        for n, passage in enumerate(split_passages(text)):
+            yield f"{post.get('url')}#{n}", post.get("title", ""), passage
+
+
+# source name -> (file in KNOWLEDGE_BASE_DIR, function yielding (key, title, passage))
+KNOWLEDGE_SOURCES = {
+    "policy": ("uscis_policy.json", _policy_documents),
+    "reddit": ("reddit_eb1a_posts.json", _reddit_documents),
+}
+# AAO decisions are read from the scraper's AAOStore, one decision at a time as they change.
+AAO_STORE_FILE = "aao_decisions.sqlite3"
+
+
+class KnowledgeIndex:
+    """Persistent BM25 index of knowledge-base passages."""
+
+    def __init__(self, path=INDEX_PATH, base_dir=KNOWLEDGE_BASE_DIR):
+        self.path = path
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " source TEXT PRIMARY KEY, signature TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS passages ("
+            " id INTEGER PRIMARY KEY,"
+            " source TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " UNIQUE (source, key));"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, passage_id INTEGER NOT NULL, tf INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_postings_term ON postings(term, passage_id, tf);"
+            "CREATE INDEX IF NOT EXISTS idx_postings_passage ON postings(passage_id);"
+        )
+        self._conn.commit()
+        # Filled on the first search and dropped whenever update() changes anything.
+        self._lengths = None
+        self._postings = {}
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+
+    @contextlib.contextmanager
+    def _write_transaction(self):
+        """
+        BEGIN IMMEDIATE ... COMMIT, rolled back on error. Batch workers open the same
+        index file, and the write lock is taken up front, so a second process waits
+        for the first to finish instead of inserting the same passages and failing.
+        Call with self._lock held.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def _signature(self, source):
+        row = self._conn.execute("SELECT signature FROM files WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def update(self):
+        """
+        Re-index sources whose file changed since the last update. Within a changed
+        file only new, edited or removed passages are touched. Returns the number
+        of passages added or replaced.
+        """
+        changed = 0
+        for source, (filename, documents) in KNOWLEDGE_SOURCES.items():
+            path = os.path.join(self.base_dir, filename)
+            if not os.path.exists(path):
+                continue
+            stat = os.stat(path)
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+            with self._lock:
+                if self._signature(source) == signature:
+                    continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping unreadable knowledge base file {path}: {e}")
+                continue
+            changed += self._sync_source(source, documents(data), signature)
+        changed += self._sync_aao_store()
+        return changed
+
+    def _sync_aao_store(self):
+        """Re-index only the decisions written to the store since the last update."""
+        path = os.path.join(self.base_dir, AAO_STORE_FILE)
+        if not os.path.exists(path):
+            return 0
+        with self._lock:
+            last_seq = int(self._signature("aao") or 0)
+        store = AAOStore(path)
+        try:
+            decisions = store.changed_since(last_seq)
+        finally:
+            store.close()
+        if not decisions:
+            return 0
+
+        changed = 0
+        with self._lock, self._write_transaction():
+            # Another process may have indexed some of these while we read the store.
+            last_seq = int(self._signature("aao") or 0)
+            decisions = [decision for decision in decisions if decision["seq"] > last_seq]
+            if not decisions:
+                return 0
+            for decision in decisions:
+                # Passage keys are "<url>#<n>"; "$" sorts right after "#".
+                url = decision["url"]
+                for (passage_id,) in self._conn.execute(
+                    "SELECT id FROM passages WHERE source = 'aao' AND key >= ? AND key < ?", (url + "#", url + "$")
+                ).fetchall():
+                    self._delete_passage(passage_id)
+                for n, passage in enumerate(split_passages(decision["text"])):
+                    self._insert_passage("aao", f"{url}#{n}", decision["title"], passage)
+                    changed += 1
+            self._conn.execute("INSERT OR REPLACE INTO files (source, signature) VALUES ('aao', ?)",
+                               (str(decisions[-1]["seq"]),))
+            self._lengths = None
+            self._postings = {}
+        print(f"📚 Indexed {len(decisions)} new or changed AAO decisions ({changed} passages)")
+        return changed
+
+    def _sync_source(self, source, documents, signature):
+        with self._lock, self._write_transaction():
+            if self._signature(source) == signature:
+                # Another process indexed this version of the file while we read it.
+                return 0
+            existing = {
+                key: (passage_id, digest) for passage_id, key, digest in
+                self._conn.execute("SELECT id, key, hash FROM passages WHERE source = ?", (source,))
+            }
+            seen = set()
+            changed = 0
+            for key, title, text in documents:
+                if key in seen:
+                    continue
+                seen.add(key)
+                digest = hashlib.sha256(f"{title}\n{text}".encode("utf-8")).hexdigest()
+                current = existing.get(key)
+                if current and current[1] == digest:
+                    continue
+                if current:
+                    self._delete_passage(current[0])
+                self._insert_passage(source, key, title, text, digest)
+                changed += 1
+            for key, (passage_id, _) in existing.items():
+                if key not in seen:
+                    self._delete_passage(passage_id)
+            self._conn.execute("INSERT OR REPLACE INTO files (source, signature) VALUES (?, ?)", (source, signature))
+            if changed or len(seen) < len(existing):
+                self._lengths = None
+                self._postings = {}
+        if changed:
+            print(f"📚 Indexed {changed} new or changed {source} passages")
+        return changed
+
+    def _insert_passage(self, source, key, title, text, digest=None):
+        digest = digest or hashlib.sha256(f"{title}\n{text}".encode("utf-8")).hexdigest()
+        terms = Counter(tokenize(f"{title} {text}"))
+        cursor = self._conn.execute(
+            "INSERT INTO passages (source, key, title, text, hash, length) VALUES (?, ?, ?, ?, ?, ?)",
+            (source, key, title, text, digest, sum(terms.values()))
+        )
+        self._conn.executemany(
+            "INSERT INTO postings (term, passage_id, tf) VALUES (?, ?, ?)",
+            [(term, cursor.lastrowid, tf) for term, tf in terms.items()]
+        )
+
+    def _delete_passage(self, passage_id):
+        self._conn.execute("DELETE FROM postings WHERE passage_id = ?", (passage_id,))
+        self._conn.execute("DELETE FROM passages WHERE id = ?", (passage_id,))
+
+    def _load_lengths(self):
+        self._lengths = {
+            passage_id: (length, source)
+            for passage_id, length, source in self._conn.execute("SELECT id, length, source FROM passages")
+        }
+        self._avg_length = (sum(length for length, _ in self._lengths.values()) / len(self._lengths)
+                            if self._lengths else 0.0)
+
+    def _term_postings(self, terms):
+        missing = [term for term in terms if term not in self._postings]
+        if missing:
+            for term in missing:
+                self._postings[term] = []
+            marks = ",".join("?" * len(missing))
+            for term, passage_id, tf in self._conn.execute(
+                f"SELECT term, passage_id, tf FROM postings WHERE term IN ({marks})", missing
+            ):
+                self._postings[term].append((passage_id, tf))
+        return {term: self._postings[term] for term in terms}
+
+    def search(self, query, top_k=RETRIEVAL_TOP_K, sources=RETRIEVAL_SOURCES):
+        """Return up to top_k [{"source", "title", "text", "score"}] ranked by BM25."""
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            if self._lengths is None:
+                self._load_lengths()
+            total, lengths, avg_length = len(self._lengths), self._lengths, self._avg_length
+            if not total:
+                return []
+
+            scores = {}
+            for term, postings in self._term_postings(terms).items():
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for passage_id, tf in postings:
+                    length, source = lengths[passage_id]
+                    if source not in sources:
+                        continue
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[passage_id] = scores.get(passage_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+            best = heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
+            results = []
+            for passage_id, score in best:
+                source, title, text = self._conn.execute(
+                    "SELECT source, title, text FROM passages WHERE id = ?", (passage_id,)
+                ).fetchone()
+                results.append({"source": source, "title": title, "text": text, "score": round(score, 4)})
+            return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_knowledge_index():
+    """
+    Shared index, opened and brought up to date on first use. Returns None when
+    there is no knowledge base to search.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            if not os.path.isdir(KNOWLEDGE_BASE_DIR):
+                return None
+            # Only keep the index once it is up to date; a failed update is retried on the next call.
+            index = KnowledgeIndex()
+            try:
+                index.update()
+            except BaseException:
+                index._conn.close()
+                raise
+            _index = index
+        return _index
+
+
+def retrieve_passages(query, top_k=RETRIEVAL_TOP_K):
+    index = get_knowledge_index()
+    if index is None or top_k <= 0:
+        return []
+    return index.search(query, top_k)
+
+
+if __name__ == "__main__":
+    count = KnowledgeIndex().update()
+    print(f"✅ Knowledge base index up to date ({count} passages added or replaced)")
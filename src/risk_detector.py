@@ -1,6 +1,66 @@
-import ollama
+import json
+import os
 import re
-from difflib import SequenceMatcher
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src import metrics
+from src.buzzwords import find_buzzwords, merge_buzzwords
+from src.letter_similarity import LetterIndex
+from src.llm_cache import cached_chat
+from src.llm_client import get_client
+from src.retrieval import retrieve_passages
+
+# Maximum number of section prompts in flight at once, and the per-request
+# timeout (seconds) after which a stuck generation is abandoned.
+MAX_CONCURRENT_SECTIONS = 4
+SECTION_TIMEOUT = 300
+
+# Section analysis asks Ollama for JSON matching RISK_ANALYSIS_SCHEMA by default.
+# Fields that come back missing or malformed are re-requested on their own, up to
+# STRUCTURED_FIELD_RETRIES times. Structured output wins over streaming: the
+# streaming settings below only apply once RISK_ANALYZER_STRUCTURED_OUTPUT=0
+# switches to free-text mode.
+STRUCTURED_OUTPUT = os.getenv("RISK_ANALYZER_STRUCTURED_OUTPUT", "1") not in ("", "0")
+STRUCTURED_FIELD_RETRIES = 2
+RISK_LEVELS = ("Low", "Medium", "High")
+RISK_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "risk_level": {"type": "string", "enum": list(RISK_LEVELS)},
+        "risk_analysis": {"type": "array", "items": {"type": "string"}},
+        "buzzwords": {"type": "array", "items": {"type": "string"}},
+        "reviewer_voice": {"type": "string"},
+        "suggested_language": {"type": "string"}
+    },
+    "required": ["risk_level", "risk_analysis", "buzzwords", "reviewer_voice", "suggested_language"]
+}
+
+# In free-text mode, section analysis streams tokens by default so results can be
+# parsed as they arrive; generation is cut off after MAX_SECTION_TOKENS streamed chunks.
+STREAM_SECTION_ANALYSIS = True
+MAX_SECTION_TOKENS = 1500
+
+# Buzzwords come from the local phrase matcher (src/buzzwords.py), which scans the
+# whole section and records offsets. Set LLM_BUZZWORDS to also ask the model for
+# them; its extra phrases are appended to the local ones.
+LLM_BUZZWORDS = False
+
+# Top policy manual / AAO passages for the criterion are quoted in each prompt.
+# Each passage is cut to REFERENCE_PASSAGE_CHARS to keep the prompt within budget.
+REFERENCE_PASSAGES = 3
+REFERENCE_PASSAGE_CHARS = 600
+
+# Long sections are split on paragraph boundaries into chunks of at most
+# CHUNK_TOKEN_BUDGET (estimated) tokens, analyzed CHUNK_WORKERS at a time and
+# merged back into one result. ~4 characters per token is close enough for English.
+CHUNK_TOKEN_BUDGET = 1000
+CHUNK_WORKERS = 2
+CHARS_PER_TOKEN = 4
+
+# Minimum shingle Jaccard similarity for two letters to be reported as near-duplicates.
+LETTER_SIMILARITY_THRESHOLD = 0.7
 
 CRITERIA_DESCRIPTIONS = {
     "Criterion 2: Judging": "Participation as a judge of the work of others in the same or related field.",
@@ -15,12 +75,228 @@ CRITERIA_DESCRIPTIONS = {
     "Unclassified": "Unclassified evidence not directly tied to USCIS criteria."
 }
 
-def analyze_section_with_deepseek(section_text, criterion_label):
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def chunk_section(section_text, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    Split a section into chunks that fit token_budget, breaking only between
+    paragraphs. A single paragraph over budget is split between sentences, and
+    a sentence over budget is cut at the character limit.
+    """
+    max_chars = token_budget * CHARS_PER_TOKEN
+    pieces = []
+    for para in re.split(r"\n{2,}", section_text.strip()):
+        para = para.strip()
+        if not para:
+            continue
+        if len(para) <= max_chars:
+            pieces.append(para)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", para):
+            pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    chunks, current, tokens = [], [], 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and tokens + piece_tokens > token_budget:
+            chunks.append("\n\n".join(current))
+            current, tokens = [], 0
+        current.append(piece)
+        tokens += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def analyze_section_with_deepseek(section_text, criterion_label, timeout=None, stream=STREAM_SECTION_ANALYSIS,
+                                  max_tokens=MAX_SECTION_TOKENS, on_section=None, structured=STRUCTURED_OUTPUT,
+                                  token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    Analyze a section against its criterion. Sections over token_budget are split
+    into chunks that are analyzed concurrently and merged (map-reduce), instead of
+    being truncated.
+    """
     print(f"🧠 Prompting Mistral for: {criterion_label}")
+    if structured and stream:
+        _note_stream_overridden()
+    with metrics.span("analyze_section", criterion=criterion_label) as attrs:
+        chunks = chunk_section(section_text, token_budget) or [""]
+        attrs["chunks"] = len(chunks)
+        if len(chunks) == 1:
+            result = _analyze_excerpt(chunks[0], criterion_label, timeout, stream, max_tokens, on_section, structured)
+        else:
+            print(f"  ➤ {criterion_label}: {len(chunks)} chunks of up to {token_budget} tokens")
+            with ThreadPoolExecutor(max_workers=max(1, CHUNK_WORKERS)) as executor:
+                result = merge_chunk_results(list(executor.map(
+                    lambda chunk: _analyze_chunk(chunk, criterion_label, timeout, stream, max_tokens, structured),
+                    chunks
+                )))
+
+        # Offsets refer to section_text as passed in, so the report can highlight them.
+        with metrics.span("buzzwords"):
+            hits = find_buzzwords(section_text)
+        result["buzzwords"] = merge_buzzwords(hits, result["buzzwords"])
+        result["buzzword_hits"] = hits
+        attrs["failed"] = bool(result.get("failed"))
+        return result
+
+_stream_note_lock = threading.Lock()
+_stream_note_printed = False
+
+def _note_stream_overridden():
+    """Say once per process that structured output turned streaming off."""
+    global _stream_note_printed
+    with _stream_note_lock:
+        if not _stream_note_printed:
+            _stream_note_printed = True
+            print("⚠️ Structured output is on, so section analysis is not streamed; "
+                  "set RISK_ANALYZER_STRUCTURED_OUTPUT=0 to stream free-text answers instead")
+
+def _analyze_chunk(chunk, criterion_label, timeout, stream, max_tokens, structured):
+    # Chunks run on their own threads, so they get their own span for LLM call attribution.
+    with metrics.span("analyze_chunk", criterion=criterion_label):
+        return _analyze_excerpt(chunk, criterion_label, timeout, stream, max_tokens, None, structured)
+
+def merge_chunk_results(results):
+    """
+    Reduce per-chunk results into one result of the usual shape: bullets and
+    buzzwords are merged without duplicates, the risk level is the highest seen,
+    the reviewer voice comes from the riskiest chunk and suggested language is
+    kept for every chunk, in order. If only some chunks failed, the merge covers
+    the rest and is marked failed (so it is not stored for reuse) and partial, and
+    the feedback ends with a warning that its risk level may be too low.
+    """
+    usable = [r for r in results if not r.get("failed")]
+    if not usable:
+        return results[0]
+
+    bullets, seen_bullets = [], set()
+    buzzwords, seen_buzzwords = [], set()
+    for result in usable:
+        for line in result["llm_feedback"].splitlines():
+            key = line.strip().lower()
+            if key and key not in seen_bullets:
+                seen_bullets.add(key)
+                bullets.append(line.strip())
+        for word in result["buzzwords"]:
+            if word.lower() not in seen_buzzwords:
+                seen_buzzwords.add(word.lower())
+                buzzwords.append(word)
+
+    levels = [r.get("risk_level") for r in usable if r.get("risk_level") in RISK_LEVELS]
+    risk_level = max(levels, key=RISK_LEVELS.index) if levels else None
+    riskiest = next((r for r in usable if r.get("risk_level") == risk_level), usable[0])
+
+    merged = {
+        "llm_feedback": "\n".join(bullets),
+        "reviewer_voice": riskiest["reviewer_voice"],
+        "buzzwords": buzzwords,
+        "suggested_language": "\n\n".join(r["suggested_language"] for r in usable if r["suggested_language"])
+    }
+    if risk_level is not None:
+        merged["risk_level"] = risk_level
+    if len(usable) < len(results):
+        print(f"⚠️ {len(results) - len(usable)} of {len(results)} chunks failed; merged the rest")
+        warning = (f"⚠️ Only {len(usable)} of {len(results)} parts of this section could be analyzed; "
+                   "the findings and risk level cover those parts only and may understate the risk.")
+        merged["llm_feedback"] = "\n".join(bullets + [warning])
+        merged["failed"] = True
+        merged["partial"] = True
+    return merged
+
+def _analyze_excerpt(section_text, criterion_label, timeout, stream, max_tokens, on_section, structured):
     criterion_description = CRITERIA_DESCRIPTIONS.get(criterion_label, "General supporting evidence.")
-    section_text = section_text[:4000]
+    references = reference_passages(criterion_label, criterion_description)
+    prompt = _build_risk_prompt(section_text, criterion_label, criterion_description, structured, references)
 
-    prompt = f"""
+    stream_stats = None
+    try:
+        # The client carries the timeout so the HTTP request is dropped
+        # (and Ollama stops generating) instead of blocking a worker forever.
+        client = get_client(timeout)
+        messages = [{"role": "user", "content": prompt}]
+        if structured:
+            return _structured_risk_analysis(client, messages)
+        if stream:
+            llm_output, stream_stats = _stream_risk_analysis(client, messages, max_tokens, on_section)
+            print(f"⏱️ {criterion_label}: first section after {_fmt_seconds(stream_stats['first_section_s'])}, "
+                  f"done in {stream_stats['total_s']:.1f}s ({stream_stats['tokens']} tokens, {stream_stats['stop_reason']})")
+        else:
+            response = cached_chat(messages=messages, client=client)
+            llm_output = response["message"]["content"]
+    except Exception as e:
+        return _error_result(e)
+
+    feedback, buzzwords, reviewer_voice, suggestion = parse_llm_risk_output(llm_output)
+    result = {
+        "llm_feedback": feedback,
+        "reviewer_voice": reviewer_voice,
+        "buzzwords": buzzwords,
+        "suggested_language": suggestion
+    }
+    if stream_stats is not None:
+        result["metrics"] = stream_stats
+    return result
+
+def reference_passages(criterion_label, criterion_description, top_k=REFERENCE_PASSAGES):
+    """Knowledge-base passages relevant to the criterion; empty if there is no index."""
+    try:
+        return retrieve_passages(f"{criterion_label} {criterion_description}", top_k)
+    except sqlite3.Error as e:
+        print(f"⚠️ Knowledge base lookup failed, analyzing without references: {e}")
+        return []
+
+def _format_references(references):
+    labels = {"policy": "USCIS Policy Manual", "aao": "AAO decision"}
+    lines = []
+    for ref in references:
+        text = ref["text"]
+        if len(text) > REFERENCE_PASSAGE_CHARS:
+            text = text[:REFERENCE_PASSAGE_CHARS].rsplit(" ", 1)[0] + " ..."
+        lines.append(f"[{labels.get(ref['source'], ref['source'])}: {ref['title']}]\n{text}")
+    return "\n\n".join(lines)
+
+def _build_risk_prompt(section_text, criterion_label, criterion_description, structured, references=None):
+    if structured:
+        output_format = """Return a JSON object with these fields:
+- "risk_level": "Low", "Medium" or "High" RFE risk for this criterion
+- "risk_analysis": list of specific findings, one sentence each
+""" + ("""- "buzzwords": list of the vague or overused phrases found in the excerpt
+""" if LLM_BUZZWORDS else "") + """- "reviewer_voice": a short memo summary in the voice of the adjudicator
+- "suggested_language": improved draft language (1–2 paragraphs)
+"""
+    else:
+        output_format = """Return in the following format:
+
+Risk Analysis:
+- [bullet point 1]
+...
+
+""" + ("""Buzzwords: ["word1", "word2", ...]
+
+""" if LLM_BUZZWORDS else "") + """Reviewer Voice:
+[Memo summary]
+
+Suggested Language:
+[Improved paragraph]
+"""
+    instructions = [
+        "Does this section meet the criterion? Be specific.",
+        "Determine if claims are independently verifiable.",
+        "Recommend improvements or additional evidence.",
+        'Provide improved draft language for the petition (1–2 paragraphs) under "Suggested Language".'
+    ]
+    if LLM_BUZZWORDS:
+        instructions.insert(1, 'Identify vague, generic, or overused phrases (e.g., “renowned expert”, '
+                               '“leading figure”) and list them under "Buzzwords".')
+    numbered = "\n".join(f"{i}. {line}" for i, line in enumerate(instructions, 1))
+    reference_block = ""
+    if references:
+        reference_block = f"""
+📚 Reference Passages (USCIS policy and AAO decisions; cite them where relevant):
+{_format_references(references)}
+"""
+    return f"""
 You are simulating a USCIS EB-1A petition adjudicator.
 
 📘 Criterion:
@@ -28,51 +304,295 @@ You are simulating a USCIS EB-1A petition adjudicator.
 
 📖 Definition:
 {criterion_description}
-
+{reference_block}
 📄 Petition Excerpt:
 \"\"\"{section_text}\"\"\"
 
 Instructions:
-1. Does this section meet the criterion? Be specific.
-2. Identify vague, generic, or overused phrases (e.g., “renowned expert”, “leading figure”) and list them under "Buzzwords".
-3. Determine if claims are independently verifiable.
-4. Recommend improvements or additional evidence.
-5. Provide improved draft language for the petition (1–2 paragraphs) under "Suggested Language".
+{numbered}
 
-Return in the following format:
+{output_format}"""
 
-Risk Analysis:
-- [bullet point 1]
-...
+def _required_fields():
+    return [f for f in RISK_ANALYSIS_SCHEMA["required"] if LLM_BUZZWORDS or f != "buzzwords"]
 
-Buzzwords: ["word1", "word2", ...]
+def validate_risk_fields(data):
+    """
+    Check a decoded JSON answer against RISK_ANALYSIS_SCHEMA.
+    Returns (valid fields, names of missing or malformed fields).
+    """
+    if not isinstance(data, dict):
+        return {}, _required_fields()
+    valid = {}
+    level = str(data.get("risk_level", "")).strip().capitalize()
+    if level in RISK_LEVELS:
+        valid["risk_level"] = level
+    bullets = data.get("risk_analysis")
+    if isinstance(bullets, list):
+        bullets = [str(b).strip().lstrip("-•* ").strip() for b in bullets if str(b).strip()]
+        if bullets:
+            valid["risk_analysis"] = bullets
+    buzzwords = data.get("buzzwords")
+    if isinstance(buzzwords, list):
+        valid["buzzwords"] = [str(b).strip() for b in buzzwords if str(b).strip()]
+    for field in ("reviewer_voice", "suggested_language"):
+        value = data.get(field)
+        if isinstance(value, str) and value.strip():
+            valid[field] = value.strip()
+    missing = [field for field in _required_fields() if field not in valid]
+    return valid, missing
 
-Reviewer Voice:
-[Memo summary]
+def _subschema(fields):
+    return {
+        "type": "object",
+        "properties": {field: RISK_ANALYSIS_SCHEMA["properties"][field] for field in fields},
+        "required": list(fields)
+    }
 
-Suggested Language:
-[Improved paragraph]
-"""
+def _has_valid_fields(fields):
+    """cached_chat validator: only JSON answers with every one of fields valid are cached."""
+    def validate(content):
+        try:
+            valid, _ = validate_risk_fields(json.loads(content))
+        except ValueError:
+            return False
+        return all(field in valid for field in fields)
+    return validate
 
+def _structured_risk_analysis(client, messages):
+    required = _required_fields()
+    response = cached_chat(messages=messages, client=client, format=_subschema(required),
+                           validate=_has_valid_fields(required))
+    answer = response["message"]["content"]
     try:
-        response = ollama.chat(model="mistral", messages=[{"role": "user", "content": prompt}])
-        llm_output = response["message"]["content"]
-    except Exception as e:
-        return {
-            "llm_feedback": f"⚠️ Mistral error during risk analysis: {e}",
-            "reviewer_voice": "",
-            "buzzwords": [],
-            "suggested_language": ""
-        }
+        fields, missing = validate_risk_fields(json.loads(answer))
+    except ValueError:
+        fields, missing = {}, required
 
-    feedback, buzzwords, reviewer_voice, suggestion = parse_llm_risk_output(llm_output)
+    last_error = "no valid fields in structured answer"
+    for _ in range(STRUCTURED_FIELD_RETRIES):
+        if not missing:
+            break
+        # Ask again for the missing fields only, keeping the first answer as context.
+        print(f"🔁 Re-requesting fields: {', '.join(missing)}")
+        follow_up = messages + [
+            {"role": "assistant", "content": answer},
+            {"role": "user", "content": "Your answer was missing or had invalid values for: "
+                                        f"{', '.join(missing)}. Return a JSON object with only these fields."}
+        ]
+        try:
+            response = cached_chat(messages=follow_up, client=client, format=_subschema(missing),
+                                   validate=_has_valid_fields(missing))
+        except Exception as e:
+            # A failed follow-up must not discard the fields already validated.
+            print(f"⚠️ Re-request failed: {e}")
+            last_error = e
+            continue
+        try:
+            retried, _ = validate_risk_fields(json.loads(response["message"]["content"]))
+        except ValueError:
+            continue
+        for field in missing:
+            if field in retried:
+                fields[field] = retried[field]
+        missing = [field for field in missing if field not in fields]
+
+    if len(missing) == len(required):
+        return _error_result(last_error)
+    if missing:
+        print(f"⚠️ Structured answer still missing: {', '.join(missing)}")
     return {
-        "llm_feedback": feedback,
-        "reviewer_voice": reviewer_voice,
-        "buzzwords": buzzwords,
-        "suggested_language": suggestion
+        "llm_feedback": "\n".join(f"- {bullet}" for bullet in fields.get("risk_analysis", [])),
+        "reviewer_voice": fields.get("reviewer_voice", ""),
+        "buzzwords": fields.get("buzzwords", []),
+        "suggested_language": fields.get("suggested_language", ""),
+        "risk_level": fields.get("risk_level")
     }
 
+def _fmt_seconds(value):
+    return "n/a" if value is None else f"{value:.1f}s"
+
+RISK_OUTPUT_SECTIONS = {
+    "risk analysis": "risk_analysis",
+    "buzzwords": "buzzwords",
+    "reviewer voice": "reviewer_voice",
+    "suggested language": "suggested_language"
+}
+# The prompt asks for 1-2 paragraphs of suggested language.
+MAX_SUGGESTED_PARAGRAPHS = 2
+
+class RiskOutputStream:
+    """
+    Incrementally tracks the Risk Analysis / Buzzwords / Reviewer Voice / Suggested
+    Language sections of a streamed response. feed() returns the sections completed
+    by the new text; `done` turns true once every section is complete, i.e. the
+    suggested language has its paragraphs or the model moves on to something else.
+    `text` holds only the lines that belong to the answer.
+    """
+
+    def __init__(self, sections=None):
+        self.sections = sections or [name for name in RISK_OUTPUT_SECTIONS.values()
+                                     if LLM_BUZZWORDS or name != "buzzwords"]
+        self.text = ""
+        self.completed = []
+        self.done = False
+        self._pending_line = ""
+        self._current = None
+        self._suggested_paragraphs = 0
+        self._in_paragraph = False
+
+    def feed(self, chunk):
+        self._pending_line += chunk
+        newly_completed = []
+        while "\n" in self._pending_line and not self.done:
+            line, self._pending_line = self._pending_line.split("\n", 1)
+            newly_completed.extend(self._handle_line(line))
+        return newly_completed
+
+    def finish(self, stream_ended=True):
+        """
+        Flush the last partial line. If the stream ended on its own, the open
+        section is complete too; after an early cut it is left incomplete.
+        """
+        newly_completed = []
+        if self._pending_line and not self.done:
+            newly_completed.extend(self._handle_line(self._pending_line))
+        self._pending_line = ""
+        if stream_ended and self._current and self._current not in self.completed:
+            newly_completed.append(self._complete(self._current))
+        return newly_completed
+
+    def _complete(self, name):
+        self.completed.append(name)
+        if all(name in self.completed for name in self.sections):
+            self.done = True
+        return name
+
+    def _handle_line(self, raw_line):
+        line = raw_line.strip()
+        newly_completed = []
+        header = line.partition(":")[0].strip().lower() if ":" in line else None
+        name = RISK_OUTPUT_SECTIONS.get(header)
+
+        if name is None and self._current == "suggested_language":
+            if re.match(r"^[A-Z][\w ()/&-]{0,40}:$", line) or ((self._in_paragraph or self._suggested_paragraphs) and line.startswith("Note:")):
+                # The model has moved on past the requested format.
+                newly_completed.append(self._complete(self._current))
+                self._current = None
+                self.done = True
+                return newly_completed
+            self.text += raw_line + "\n"
+            if line:
+                self._in_paragraph = True
+            elif self._in_paragraph:
+                self._in_paragraph = False
+                self._suggested_paragraphs += 1
+                if self._suggested_paragraphs >= MAX_SUGGESTED_PARAGRAPHS:
+                    newly_completed.append(self._complete(self._current))
+                    self._current = None
+            return newly_completed
+
+        if name is not None:
+            if self._current and self._current not in self.completed:
+                newly_completed.append(self._complete(self._current))
+            if name in self.completed:
+                # A repeated header means the model started over; everything needed is in.
+                self.done = True
+                return newly_completed
+            self._current = name
+            if name == "buzzwords":
+                # Buzzwords are a single line: the header line carries the whole list.
+                newly_completed.append(self._complete(name))
+                self._current = None
+
+        self.text += raw_line + "\n"
+        return newly_completed
+
+def _stream_risk_analysis(client, messages, max_tokens, on_section=None):
+    """Stream one analysis, stopping when all sections are in or max_tokens is reached."""
+    started = time.perf_counter()
+    tracker = RiskOutputStream()
+    stream_stats = {"first_token_s": None, "first_section_s": None, "sections_s": {},
+                    "total_s": None, "tokens": 0, "stop_reason": "completed", "cached": False}
+
+    def section_done(names):
+        elapsed = time.perf_counter() - started
+        for name in names:
+            stream_stats["sections_s"][name] = round(elapsed, 3)
+            if stream_stats["first_section_s"] is None:
+                stream_stats["first_section_s"] = round(elapsed, 3)
+            if on_section:
+                on_section(name, elapsed)
+
+    # Cache only answers that ran to the end or stopped with every section in;
+    # a budget cut (or an error below) leaves a partial answer that must not be replayed.
+    chunks = cached_chat(messages=messages, client=client, stream=True,
+                         validate=lambda text: stream_stats["stop_reason"] in ("completed", "all sections complete"))
+    try:
+        for chunk in chunks:
+            if chunk.get("cached"):
+                stream_stats["cached"] = True
+            if stream_stats["first_token_s"] is None:
+                stream_stats["first_token_s"] = round(time.perf_counter() - started, 3)
+            stream_stats["tokens"] += 1
+            section_done(tracker.feed(chunk["message"]["content"]))
+            if tracker.done:
+                stream_stats["stop_reason"] = "all sections complete"
+                break
+            if max_tokens and stream_stats["tokens"] >= max_tokens:
+                stream_stats["stop_reason"] = "token budget"
+                break
+    except BaseException:
+        stream_stats["stop_reason"] = "error"
+        raise
+    finally:
+        # Closing the stream drops the connection so Ollama stops generating.
+        if hasattr(chunks, "close"):
+            chunks.close()
+    section_done(tracker.finish(stream_ended=stream_stats["stop_reason"] == "completed"))
+    stream_stats["total_s"] = round(time.perf_counter() - started, 3)
+    return tracker.text, stream_stats
+
+def _error_result(error):
+    return {
+        "llm_feedback": f"⚠️ Mistral error during risk analysis: {error}",
+        "reviewer_voice": "",
+        "buzzwords": [],
+        "suggested_language": "",
+        "failed": True
+    }
+
+def analyze_sections_concurrently(jobs, max_workers=MAX_CONCURRENT_SECTIONS, timeout=SECTION_TIMEOUT):
+    """
+    Analyze (section_text, criterion_label) jobs on a bounded thread pool.
+    Results are returned in the same order as jobs, whatever order they finish in.
+    A section that times out or fails gets an error result instead of stalling the run.
+    """
+    results = [None] * len(jobs)
+    if not jobs:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    futures = {
+        executor.submit(analyze_section_with_deepseek, text, label, timeout): idx
+        for idx, (text, label) in enumerate(jobs)
+    }
+    try:
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                results[idx] = future.result()
+            except Exception as e:
+                results[idx] = _error_result(e)
+    except BaseException:
+        # Ctrl-C or similar: drop everything still queued and don't wait on it.
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        raise
+    executor.shutdown()
+    return results
+
 def parse_llm_risk_output(text):
     risk_lines = []
     buzzwords = []
@@ -89,8 +609,10 @@ def parse_llm_risk_output(text):
             in_risk = in_review = in_suggest = False
             buzzwords_line = line.partition(":")[2].strip()
             try:
-                buzzwords = eval(buzzwords_line)
-            except:
+                buzzwords = json.loads(buzzwords_line)
+                if not isinstance(buzzwords, list):
+                    raise ValueError("buzzwords is not a list")
+            except ValueError:
                 buzzwords = re.findall(r'"(.*?)"', buzzwords_line)
             continue
         elif line.lower().startswith("reviewer voice:"):
@@ -109,16 +631,28 @@ def parse_llm_risk_output(text):
 
     return "\n".join(risk_lines).strip(), buzzwords, reviewer_voice.strip(), suggested_text.strip()
 
-def check_letter_similarity(sections, threshold=0.85):
-    letters = {k: v for k, v in sections.items() if "recommendation" in k.lower()}
-    flagged = []
-    names = list(letters.keys())
-    for i in range(len(names)):
-        for j in range(i+1, len(names)):
-            a, b = names[i], names[j]
-            sim = SequenceMatcher(None, letters[a], letters[b]).ratio()
-            if sim >= threshold:
-                flagged.append((a, b, round(sim, 2)))
+def check_letter_similarity(letters, threshold=LETTER_SIMILARITY_THRESHOLD, archive=None, petition_id=None):
+    """
+    Flag near-duplicate recommendation letters ({letter_id: text}, as produced by
+    parser.split_recommendation_letters) using a MinHash/LSH index, so only
+    candidate pairs are compared. Similarity is the Jaccard overlap of word shingles.
+    If an archive LetterIndex is given, each letter is also checked against every
+    archived letter; those hits are reported as (letter, archived_id, similarity).
+    Archived letters filed under petition_id ("<petition_id>:<letter>") are this
+    petition's own letters from an earlier run and are skipped.
+    """
+    own_prefix = f"{petition_id}:" if petition_id else None
+    index = LetterIndex()
+    for name, text in letters.items():
+        index.add(name, text)
+
+    flagged = [(a, b, round(sim, 2)) for a, b, sim in index.similar_pairs(threshold)]
+    if archive is not None:
+        for name, text in letters.items():
+            for archived_id, sim in archive.query(text, threshold):
+                if own_prefix and str(archived_id).startswith(own_prefix):
+                    continue
+                flagged.append((name, archived_id, round(sim, 2)))
     return flagged
 
 def detect_field_inconsistencies(all_texts):
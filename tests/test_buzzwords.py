@@ -0,0 +1,31 @@
+from src.buzzwords import PhraseMatcher
+
+
+def test_phrase_matcher_finds_whole_words_case_insensitively():
+    matcher = PhraseMatcher(["renowned expert", "pioneer"])
+    text = "A Renowned  Expert and pioneer, not a pioneering one."
+    assert matcher.find(text) == [
+        {"phrase": "renowned expert", "text": "Renowned  Expert", "start": 2, "end": 18},
+        {"phrase": "pioneer", "text": "pioneer", "start": 23, "end": 30},
+    ]
+
+
+def test_phrase_matcher_reports_overlaps_but_find_prefers_the_longest():
+    matcher = PhraseMatcher(["world renowned", "renowned", "renowned expert", "world renowned expert"])
+    text = "a world renowned expert"
+    assert sorted(matcher.finditer(text)) == [
+        (2, 16, "world renowned"), (2, 23, "world renowned expert"), (8, 16, "renowned"), (8, 23, "renowned expert")
+    ]
+    assert [hit["phrase"] for hit in matcher.find(text)] == ["world renowned expert"]
+
+
+def test_phrase_matcher_follows_failure_links():
+    # "he" is only found through the failure link out of "she"/"hers"
+    matcher = PhraseMatcher(["he", "she", "his", "hers"])
+    assert sorted(phrase for _, _, phrase in matcher.finditer("ushers he his she")) == ["he", "his", "she"]
+
+
+def test_phrase_matcher_ignores_duplicates_and_empty_phrases():
+    matcher = PhraseMatcher(["Key role", "key  role", "", "   "])
+    assert matcher.phrases == ["Key role"]
+    assert matcher.find("no match here") == []
@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from src import letter_similarity
+from src.letter_similarity import LetterIndex, MinHasher, jaccard, shingles
+
+LETTER = ("I have known Dr. Doe for eight years and consider her framework for distributed inference "
+          "one of the most important contributions to the field, adopted by three independent laboratories.")
+
+
+def test_minhash_numpy_and_pure_python_signatures_match(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(0)
+    shingle_sets = [set(), {0}, {2 ** 32 - 1}, shingles(LETTER)]
+    shingle_sets += [{rng.getrandbits(32) for _ in range(rng.randint(1, 300))} for _ in range(20)]
+
+    with_numpy = MinHasher()
+    expected = [with_numpy.signature(s) for s in shingle_sets]
+    monkeypatch.setattr(letter_similarity, "_np", None)
+    pure_python = MinHasher()
+    assert [pure_python.signature(s) for s in shingle_sets] == expected
+
+
+def test_letter_index_finds_near_duplicates_only():
+    index = LetterIndex()
+    index.add("a", LETTER)
+    index.add("b", LETTER.replace("eight", "nine"))
+    index.add("c", "Her work on coastal erosion modeling is cited by every group working on storm surge forecasts.")
+    pairs = index.similar_pairs(0.5)
+    assert [(a, b) for a, b, _ in pairs] == [("a", "b")]
+    assert pairs[0][2] == pytest.approx(jaccard(shingles(LETTER), shingles(LETTER.replace("eight", "nine"))))
+    assert index.query(LETTER, 0.99) == [("a", 1.0)]
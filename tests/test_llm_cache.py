@@ -0,0 +1,51 @@
+import pytest
+
+from src import llm_cache
+from src.llm_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.put("k", "mistral", "answer")
+    clock.now += 59
+    assert cache.get("k") == "answer"
+    clock.now += 2
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_cap(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=20, ttl=0)
+    cache.put("a", "mistral", "x" * 8)
+    clock.now += 1
+    cache.put("b", "mistral", "y" * 8)
+    clock.now += 1
+    assert cache.get("a") == "x" * 8  # a is now more recently used than b
+    clock.now += 1
+    cache.put("c", "mistral", "z" * 8)
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 8
+    assert cache.get("c") == "z" * 8
+
+
+def test_keys_depend_on_model_messages_options_and_format():
+    messages = [{"role": "user", "content": "hi"}]
+    key = ResponseCache.make_key("mistral", messages)
+    assert key == ResponseCache.make_key("mistral", [{"content": "hi", "role": "user"}], {})
+    assert key != ResponseCache.make_key("llama3", messages)
+    assert key != ResponseCache.make_key("mistral", messages, {"temperature": 0})
+    assert key != ResponseCache.make_key("mistral", messages, format={"type": "object"})
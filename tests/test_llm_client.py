@@ -0,0 +1,81 @@
+import httpx
+import ollama
+import pytest
+
+from src import llm_client
+from src.llm_client import LLM_BACKOFF, LLM_BACKOFF_MAX, LLM_RETRIES, backoff_delay, chat, chat_stream, is_transient
+
+
+@pytest.mark.parametrize("error, transient", [
+    (ollama.ResponseError("busy", 503), True),
+    (ollama.ResponseError("rate limited", 429), True),
+    (ollama.ResponseError("model not found", 404), False),
+    (ConnectionError("refused"), True),
+    (httpx.ConnectError("refused"), True),
+    (httpx.RemoteProtocolError("connection dropped"), True),
+    (httpx.ReadTimeout("deadline"), False),
+    (ValueError("bad request"), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    for attempt in range(10):
+        delays = [backoff_delay(attempt) for _ in range(50)]
+        assert all(0 <= delay <= min(LLM_BACKOFF_MAX, LLM_BACKOFF * 2 ** attempt) for delay in delays)
+        assert len(set(delays)) > 1
+
+
+class FlakyClient:
+    """Fails with each error in turn, then answers."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def chat(self, model, messages, options=None, stream=False, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        if stream:
+            return iter([{"message": {"content": "o"}}, {"message": {"content": "k"}, "done": True}])
+        return {"message": {"content": "ok"}, "done": True}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waited = []
+    monkeypatch.setattr(llm_client.time, "sleep", waited.append)
+    return waited
+
+
+def test_chat_retries_transient_errors(sleeps):
+    client = FlakyClient(ConnectionError("refused"), ollama.ResponseError("busy", 503))
+    assert chat([], client=client)["message"]["content"] == "ok"
+    assert client.calls == 3
+    assert len(sleeps) == 2
+
+
+def test_chat_gives_up_after_the_retry_limit(sleeps):
+    client = FlakyClient(*[ConnectionError("refused")] * (LLM_RETRIES + 1))
+    with pytest.raises(ConnectionError):
+        chat([], client=client)
+    assert client.calls == LLM_RETRIES + 1
+
+
+def test_chat_does_not_retry_permanent_errors(sleeps):
+    client = FlakyClient(ollama.ResponseError("model not found", 404))
+    with pytest.raises(ollama.ResponseError):
+        chat([], client=client)
+    assert client.calls == 1
+    assert not sleeps
+
+
+def test_chat_stream_retries_before_the_first_chunk(sleeps):
+    client = FlakyClient(httpx.ConnectError("refused"))
+    finished = []
+    chunks = list(chat_stream([], client=client, on_done=lambda text, done: finished.append((text, done))))
+    assert [chunk["message"]["content"] for chunk in chunks] == ["o", "k"]
+    assert client.calls == 2
+    assert finished == [("ok", True)]
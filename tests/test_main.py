@@ -0,0 +1,26 @@
+import os
+
+from main import _report_paths
+
+
+def _names(paths):
+    return [os.path.basename(path) for path in paths]
+
+
+def test_report_paths_are_named_after_the_petition():
+    paths = _report_paths(["in/alice.pdf", "in/bob.docx"], "out")
+    assert paths == [os.path.join("out", "alice_rfe_risk_report.docx"), os.path.join("out", "bob_rfe_risk_report.docx")]
+
+
+def test_report_paths_qualify_clashing_names():
+    inputs = [os.path.join("in", "a", "main.pdf"), os.path.join("in", "b", "main.pdf"), os.path.join("in", "b", "main.docx")]
+    assert _names(_report_paths(inputs, "out")) == [
+        "a_main_pdf_rfe_risk_report.docx", "b_main_pdf_rfe_risk_report.docx", "b_main_docx_rfe_risk_report.docx"
+    ]
+
+
+def test_report_paths_number_names_that_still_clash():
+    inputs = [os.path.join("in", "a_b", "main.pdf"), os.path.join("in", "a", "b", "main.pdf"), os.path.join("in", "c", "Main.PDF")]
+    assert _names(_report_paths(inputs, "out")) == [
+        "a_b_main_pdf_rfe_risk_report.docx", "a_b_main_pdf_2_rfe_risk_report.docx", "Main_rfe_risk_report.docx"
+    ]
@@ -0,0 +1,40 @@
+from src.manifest import (
+    MANIFEST_VERSION, fingerprint, load_manifest, manifest_path_for, reusable_analysis, save_manifest
+)
+
+
+def test_manifest_round_trip_reuses_unchanged_sections_only(tmp_path):
+    path = str(tmp_path / "outputs" / "report.manifest.json")
+    sections = {"judging": "Dr. Doe reviewed for NeurIPS.\n\n", "authorship": "Dr. Doe published 12 papers.\n\n"}
+    analysis = {"section": "judging", "llm_feedback": "- Few reviews.", "risk_level": "Medium"}
+    labeled = [("Dr. Doe reviewed for NeurIPS.", "judging"), ("Dr. Doe published 12 papers.", "authorship")]
+    save_manifest(path, labeled, sections, [analysis])
+
+    manifest = load_manifest(path)
+    assert manifest["version"] == MANIFEST_VERSION
+    assert manifest["paragraphs"] == {fingerprint(para): key for para, key in labeled}
+    assert reusable_analysis(manifest, "judging", sections["judging"]) == analysis
+    assert reusable_analysis(manifest, "judging", "Dr. Doe reviewed for ICML.\n\n") is None
+    # authorship had no stored analysis (e.g. it failed), so it is analyzed again
+    assert reusable_analysis(manifest, "authorship", sections["authorship"]) is None
+
+
+def test_manifest_leaves_out_paragraphs_without_a_label(tmp_path):
+    path = str(tmp_path / "report.manifest.json")
+    save_manifest(path, [("Labelled.", "judging"), ("The LLM failed on this one.", None)], {}, [])
+    assert load_manifest(path)["paragraphs"] == {fingerprint("Labelled."): "judging"}
+
+
+def test_load_manifest_ignores_missing_unreadable_and_stale_files(tmp_path):
+    empty = {"version": MANIFEST_VERSION, "paragraphs": {}, "sections": {}}
+    assert load_manifest(str(tmp_path / "missing.json")) == empty
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json", encoding="utf-8")
+    assert load_manifest(str(broken)) == empty
+    stale = tmp_path / "stale.json"
+    stale.write_text('{"version": 0, "paragraphs": {"x": "judging"}, "sections": {}}', encoding="utf-8")
+    assert load_manifest(str(stale)) == empty
+
+
+def test_manifest_path_sits_next_to_the_report():
+    assert manifest_path_for("outputs/report.docx") == "outputs/report.manifest.json"
@@ -0,0 +1,187 @@
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import llm_cache, llm_client, parser
+from src.manifest import fingerprint
+from src.parser import (
+    _parse_batch_labels, classify_paragraphs, iter_letters, iter_pdf_pages, letter_paragraphs, paragraphs_from_chunks, run_llm_batch_classification,
+    run_llm_classification
+)
+
+
+@pytest.mark.parametrize("chunks", [
+    [""],
+    ["one paragraph"],
+    ["first", "", "second"],
+    ["first", "", "", "", "second", ""],
+    ["ends with a break\n\n", "next page"],
+    ["\n\nstarts with a break", "more"],
+    ["a\nb", "c\n\n\nd", "", "e\n"],
+])
+def test_paragraphs_from_chunks_matches_split_of_joined_text(chunks):
+    assert list(paragraphs_from_chunks(chunks)) == re.split(r"\n{2,}", "\n".join(chunks))
+
+
+def test_paragraphs_from_chunks_matches_split_on_random_chunks():
+    rng = random.Random(0)
+    for _ in range(200):
+        chunks = ["".join(rng.choice(["a", "b", " ", "\n", "\n\n"]) for _ in range(rng.randint(0, 8)))
+                  for _ in range(rng.randint(1, 6))]
+        assert list(paragraphs_from_chunks(chunks)) == re.split(r"\n{2,}", "\n".join(chunks))
+
+
+@pytest.mark.parametrize("answer", [
+    "1: judging\n2: other\n3: media_coverage",
+    "[1]. Judging\n[2] - Other\n[3]: media coverage",
+    "Here are the labels:\n1. judging\n2) other\n\n3 - Media Coverage.",
+])
+def test_parse_batch_labels_accepts_common_answer_formats(answer):
+    assert _parse_batch_labels(answer, 3) == {0: "judging", 1: "other", 2: "media_coverage"}
+
+
+def test_parse_batch_labels_drops_unknown_labels_and_positions():
+    answer = "1: judging\n1: awards\n2: prizes\n4: other\n0: other\nthree: other"
+    assert _parse_batch_labels(answer, 3) == {0: "judging"}
+
+
+LETTER_ONE = [
+    "Letter of Recommendation from Professor Alan Smith",
+    "Dear Officer,",
+    "I have followed Dr. Doe's work on distributed inference for eight years and consider it among the most "
+    "important contributions to the field in the past decade, as the adoption by three laboratories shows.",
+    "Sincerely,\nProfessor Alan Smith",
+    "Massachusetts Institute of Technology",
+]
+LETTER_TWO = [
+    "To Whom It May Concern:",
+    "Dr. Doe's compiler work is used by my team every day, and I know of no other engineer whose tools have had "
+    "a comparable effect on how production machine learning systems are built and deployed today.",
+    "Best regards,\nJane Roe",
+]
+
+
+def test_iter_letters_splits_on_headers_salutations_and_sign_offs():
+    letters = list(iter_letters(LETTER_ONE + LETTER_TWO))
+    assert letters == ["\n\n".join(LETTER_ONE), "\n\n".join(LETTER_TWO)]
+
+
+def test_iter_letters_ends_a_signed_letter_at_the_next_long_paragraph():
+    trailing = ("The remaining exhibits document the beneficiary's publications, citations and judging, "
+                "organized by criterion in the same order in which they are discussed in the petition letter above.")
+    letters = list(iter_letters(LETTER_TWO + [trailing]))
+    assert letters == ["\n\n".join(LETTER_TWO), trailing]
+
+
+def test_iter_letters_keeps_a_salutation_without_body_with_its_header():
+    letters = list(iter_letters(["Exhibit 4: Support Letter", "Dear Officer,", "I support the petition."]))
+    assert letters == ["Exhibit 4: Support Letter\n\nDear Officer,\n\nI support the petition."]
+
+
+def test_letter_paragraphs_takes_letters_whole_whatever_their_labels():
+    brief = "Dr. Doe published twelve papers in leading journals, with more than 900 citations in total."
+    labeled = ([(brief, "authorship")]
+               + [(para, "authorship") for para in LETTER_ONE]
+               + [("Taken together, the publications, citations, judging and letters show that the beneficiary has "
+                   "sustained national acclaim and is among the small percentage at the top of the field.", "final_merits")]
+               + [(para, "other") for para in LETTER_TWO])
+    assert letter_paragraphs(labeled) == LETTER_ONE + LETTER_TWO
+
+
+def test_letter_paragraphs_does_not_expand_a_salutation_without_sign_off():
+    labeled = [("Dear Officer, please find the petition enclosed.", "recommendation_letters"),
+               ("Dr. Doe reviewed papers for NeurIPS.", "judging")]
+    assert letter_paragraphs(labeled) == ["Dear Officer, please find the petition enclosed."]
+
+
+@pytest.fixture
+def llm_answers(tmp_path, monkeypatch):
+    """Answer LLM requests from a list through a fresh on-disk cache; returns the list of requests made."""
+    answers, requests = [], []
+
+    def chat(messages, model=None, options=None, client=None, **kwargs):
+        requests.append(messages)
+        return {"message": {"content": answers.pop(0)}}
+
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.ResponseCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(llm_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_client, "chat", chat)
+    return answers, requests
+
+
+def test_unknown_labels_are_not_cached(llm_answers):
+    answers, requests = llm_answers
+    answers += ["I think this is about awards", "judging", "judging"]
+    assert run_llm_classification("Dr. Doe sat on the NSF panel.") == "i think this is about awards"
+    assert run_llm_classification("Dr. Doe sat on the NSF panel.") == "judging"
+    assert run_llm_classification("Dr. Doe sat on the NSF panel.") == "judging"
+    assert len(requests) == 2
+
+
+def test_batch_answers_are_cached_only_when_every_paragraph_is_labelled(llm_answers):
+    answers, requests = llm_answers
+    paragraphs = ["Dr. Doe sat on the NSF panel.", "Table of Contents"]
+    answers += ["1: judging", "1: judging\n2: other"]
+    assert run_llm_batch_classification(paragraphs) == {0: "judging"}
+    assert run_llm_batch_classification(paragraphs) == {0: "judging", 1: "other"}
+    assert run_llm_batch_classification(paragraphs) == {0: "judging", 1: "other"}
+    assert len(requests) == 2
+
+
+def test_classifier_is_not_trained_when_every_paragraph_is_labelled(monkeypatch):
+    def untrained():
+        raise AssertionError("classifier trained without an unmatched paragraph")
+
+    monkeypatch.setattr(parser, "get_section_classifier", untrained)
+    paragraphs = ["Dr. Doe sat on the NSF panel.", "Table of Contents"]
+    known = {fingerprint(paragraphs[0]): "judging", fingerprint(paragraphs[1]): "other"}
+    assert classify_paragraphs("\n\n".join(paragraphs), known) == [(paragraphs[0], "judging"), (paragraphs[1], "other")]
+
+
+def test_classification_batches_are_packed_by_token_budget(monkeypatch):
+    batches = []
+
+    def classify_batch(batch, use_classifier=False):
+        batches.append([idx for idx, _ in batch])
+        return {idx: "other" for idx, _ in batch}
+
+    monkeypatch.setattr(parser, "_classify_batch", classify_batch)
+    monkeypatch.setattr(parser, "match_segment", lambda para: None)
+    short = "word " * 40  # ~50 tokens
+    long = "word " * 400  # ~500 tokens
+    paragraphs = [short] * 3 + [long] * 2 + [long * 3] + [short] * 30
+    labeled = classify_paragraphs("\n\n".join(paragraphs), batch_size=20, max_workers=1, batch_tokens=1000)
+    assert len(labeled) == len(paragraphs)
+    assert batches == [[0, 1, 2, 3], [4], [5], list(range(6, 26)), list(range(26, 36))]
+
+
+@pytest.fixture
+def long_pdf(tmp_path):
+    pymupdf = pytest.importorskip("pymupdf")
+    path = str(tmp_path / "long.pdf")
+    doc = pymupdf.open()
+    for n in range(parser.PARALLEL_PAGE_THRESHOLD + 30):
+        doc.new_page().insert_text((72, 72), f"Page {n}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_iter_pdf_pages_keeps_a_bounded_number_of_ranges_in_flight(long_pdf, monkeypatch):
+    submitted = []
+
+    class Executor(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            submitted.append(args[2])
+            return super().submit(fn, *args)
+
+    monkeypatch.setattr(parser, "ProcessPoolExecutor", Executor)
+    monkeypatch.setattr(parser, "PAGES_PER_TASK", 10)
+    pages = iter_pdf_pages(long_pdf, backend="pymupdf", workers=2)
+    assert next(pages).strip() == "Page 0"
+    assert len(submitted) == 2 * parser.PDF_RANGES_IN_FLIGHT + 1
+    rest = list(pages)
+    assert [page.strip() for page in rest] == [f"Page {n}" for n in range(1, parser.PARALLEL_PAGE_THRESHOLD + 30)]
+    assert submitted == list(range(0, parser.PARALLEL_PAGE_THRESHOLD + 30, 10))
@@ -0,0 +1,46 @@
+from src.report_generator import EXCERPT_CHARS, FINAL_DIGEST_BULLETS, _excerpt_fragments, build_section_digest
+from src.risk_detector import CHARS_PER_TOKEN
+
+
+def _section(criteria, level, findings):
+    return {"criteria": criteria, "risk_level": level,
+            "llm_feedback": "\n".join(f"- {finding}" for finding in findings)}
+
+
+def test_digest_lists_sections_in_document_order_with_their_findings():
+    digest = build_section_digest([
+        _section("Awards", "Low", ["Only one award."]),
+        _section("Judging", "High", ["A single review.", "No national panel."]),
+    ])
+    assert digest.splitlines() == [
+        "- Awards [Low]", "  • Only one award.",
+        "- Judging [High]", "  • A single review.", "  • No national panel.",
+    ]
+
+
+def test_digest_skips_error_messages_and_caps_findings():
+    digest = build_section_digest([
+        {"criteria": "Awards", "llm_feedback": "⚠️ Mistral error during risk analysis: timed out"},
+        _section("Judging", "Medium", [f"Finding {n}." for n in range(10)]),
+    ])
+    lines = digest.splitlines()
+    assert lines[0].startswith("- Awards [")
+    assert lines[1] == "- Judging [Medium]"
+    assert len(lines) == 2 + FINAL_DIGEST_BULLETS
+
+
+def test_digest_keeps_the_riskiest_sections_within_budget():
+    sections = [_section(f"Low {n}", "Low", ["x" * 150] * 3) for n in range(20)]
+    sections.insert(10, _section("Judging", "High", ["A single review."]))
+    digest = build_section_digest(sections, token_budget=200)
+    assert len(digest) <= 200 * CHARS_PER_TOKEN + 100
+    assert "- Judging [High]\n  • A single review." in digest
+    assert digest.splitlines()[-1].startswith("- ...and ")
+    assert digest.splitlines()[-1].endswith(" Low)")
+
+
+def test_excerpt_highlights_only_hits_inside_the_quoted_text():
+    content = "x" * (EXCERPT_CHARS - 10) + " world-class expert in the field"
+    hits = [{"start": 0, "end": 1}, {"start": EXCERPT_CHARS - 9, "end": EXCERPT_CHARS + 2}]
+    entry = {"excerpt": content[:EXCERPT_CHARS] + "...", "buzzword_hits": hits}
+    assert [text for text, flagged in _excerpt_fragments(entry) if flagged] == ["x"]
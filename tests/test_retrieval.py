@@ -0,0 +1,63 @@
+import json
+import multiprocessing
+import os
+
+from src.retrieval import KnowledgeIndex
+
+
+def _write_policy(base_dir, sections):
+    path = os.path.join(base_dir, "uscis_policy.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(sections, f)
+    # Make sure the signature changes even on filesystems with coarse timestamps.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+POLICY = {
+    "Extraordinary ability": "The beneficiary must show sustained national or international acclaim.",
+    "Judging": "Participation as a judge of the work of others in the same or an allied field.",
+}
+
+
+def test_update_only_touches_changed_passages(tmp_path):
+    _write_policy(tmp_path, POLICY)
+    index = KnowledgeIndex(path=str(tmp_path / "index.sqlite3"), base_dir=str(tmp_path))
+    assert index.update() == 2
+    assert index.update() == 0
+
+    _write_policy(tmp_path, dict(POLICY, Judging="Reviewing manuscripts for journals counts as judging."))
+    assert index.update() == 1
+    assert len(index) == 2
+    assert index.search("manuscripts journals")[0]["title"] == "Judging"
+    assert not index.search("allied")
+
+    _write_policy(tmp_path, {"Judging": POLICY["Judging"]})
+    assert index.update() == 1
+    assert len(index) == 1
+    assert not index.search("acclaim")
+
+
+def test_reopened_index_skips_unchanged_files(tmp_path):
+    _write_policy(tmp_path, POLICY)
+    path = str(tmp_path / "index.sqlite3")
+    assert KnowledgeIndex(path=path, base_dir=str(tmp_path)).update() == 2
+    index = KnowledgeIndex(path=path, base_dir=str(tmp_path))
+    assert index.update() == 0
+    assert index.search("acclaim")[0]["title"] == "Extraordinary ability"
+
+
+def _update(args):
+    path, base_dir = args
+    KnowledgeIndex(path=path, base_dir=base_dir).update()
+    return True
+
+
+def test_concurrent_updates_of_a_fresh_index(tmp_path):
+    _write_policy(tmp_path, {f"Section {n}": f"policy text number {n} " * 20 for n in range(50)})
+    path = str(tmp_path / "index.sqlite3")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        assert pool.map(_update, [(path, str(tmp_path))] * 4) == [True] * 4
+    index = KnowledgeIndex(path=path, base_dir=str(tmp_path))
+    assert len(index) == 50
+    assert index.update() == 0
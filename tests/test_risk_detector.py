@@ -0,0 +1,174 @@
+import json
+
+from src import risk_detector
+from src.risk_detector import (
+    CHARS_PER_TOKEN, RiskOutputStream, _required_fields, _structured_risk_analysis, chunk_section, estimate_tokens,
+    merge_chunk_results, validate_risk_fields
+)
+
+
+def _result(level, feedback, buzzwords=(), voice="", suggestion=""):
+    return {"llm_feedback": feedback, "reviewer_voice": voice, "buzzwords": list(buzzwords),
+            "suggested_language": suggestion, "risk_level": level}
+
+
+FAILED = {"llm_feedback": "⚠️ Mistral error during risk analysis: timed out", "reviewer_voice": "",
+          "buzzwords": [], "suggested_language": "", "failed": True}
+
+
+def test_chunk_section_keeps_short_sections_whole():
+    assert chunk_section("First paragraph.\n\nSecond paragraph.", token_budget=100) == [
+        "First paragraph.\n\nSecond paragraph."
+    ]
+
+
+def test_chunk_section_breaks_between_paragraphs_within_budget():
+    paragraphs = [f"Paragraph {i} " + "word " * 30 for i in range(10)]
+    chunks = chunk_section("\n\n".join(paragraphs), token_budget=100)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert "\n\n".join(chunks).split("\n\n") == [p.strip() for p in paragraphs]
+
+
+def test_chunk_section_splits_oversized_paragraphs_and_sentences():
+    sentence = "x" * (25 * CHARS_PER_TOKEN)
+    chunks = chunk_section(f"Short one. {sentence}", token_budget=10)
+    assert chunks[0] == "Short one."
+    assert all(len(chunk) <= 10 * CHARS_PER_TOKEN for chunk in chunks)
+    assert "".join(chunks[1:]) == sentence
+
+
+def test_merge_chunk_results_takes_highest_risk_and_deduplicates():
+    merged = merge_chunk_results([
+        _result("Low", "- Citations lack context.", ["renowned"], "Low voice", "First."),
+        _result("High", "- citations lack context.\n- No adoption evidence.", ["Renowned", "pioneer"],
+                "High voice", "Second."),
+    ])
+    assert merged["risk_level"] == "High"
+    assert merged["llm_feedback"] == "- Citations lack context.\n- No adoption evidence."
+    assert merged["buzzwords"] == ["renowned", "pioneer"]
+    assert merged["reviewer_voice"] == "High voice"
+    assert merged["suggested_language"] == "First.\n\nSecond."
+    assert not merged.get("failed")
+
+
+def test_merge_chunk_results_marks_partial_merges_failed():
+    merged = merge_chunk_results([_result("Low", "- Minor gap."), FAILED])
+    assert merged["failed"] and merged["partial"]
+    assert merged["risk_level"] == "Low"
+    findings, warning = merged["llm_feedback"].split("\n", 1)
+    assert findings == "- Minor gap."
+    assert warning.startswith("⚠️ Only 1 of 2 parts")
+
+
+def test_merge_chunk_results_returns_the_error_when_every_chunk_failed():
+    assert merge_chunk_results([FAILED, FAILED]) is FAILED
+
+VALID = {"risk_level": "high", "risk_analysis": ["- Adoption is asserted, not shown.", " "],
+         "buzzwords": ["renowned expert", ""], "reviewer_voice": " The record is thin. ",
+         "suggested_language": "Cite Exhibits 12-14."}
+
+
+def test_validate_risk_fields_normalizes_valid_answers():
+    valid, missing = validate_risk_fields(VALID)
+    assert missing == []
+    assert valid == {"risk_level": "High", "risk_analysis": ["Adoption is asserted, not shown."],
+                     "buzzwords": ["renowned expert"], "reviewer_voice": "The record is thin.",
+                     "suggested_language": "Cite Exhibits 12-14."}
+
+
+def test_validate_risk_fields_reports_missing_and_malformed_fields():
+    valid, missing = validate_risk_fields({"risk_level": "Severe", "risk_analysis": [], "reviewer_voice": 3,
+                                           "suggested_language": "Keep."})
+    assert valid == {"suggested_language": "Keep."}
+    assert set(missing) == set(_required_fields()) - {"suggested_language"}
+    assert validate_risk_fields(["not", "an", "object"]) == ({}, _required_fields())
+
+
+def _fake_chat(monkeypatch, answers):
+    calls = []
+
+    def chat(messages, client=None, format=None, validate=None):
+        calls.append(format["required"])
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return {"message": {"content": json.dumps(answer)}}
+
+    monkeypatch.setattr(risk_detector, "cached_chat", chat)
+    return calls
+
+
+def test_structured_analysis_merges_re_requested_fields(monkeypatch):
+    first = {key: value for key, value in VALID.items() if key != "reviewer_voice"}
+    calls = _fake_chat(monkeypatch, [first, {"reviewer_voice": "The record is thin."}])
+    result = _structured_risk_analysis(None, [{"role": "user", "content": "analyze"}])
+    assert calls[1] == ["reviewer_voice"]
+    assert result["risk_level"] == "High"
+    assert result["reviewer_voice"] == "The record is thin."
+    assert result["llm_feedback"] == "- Adoption is asserted, not shown."
+
+
+def test_structured_analysis_keeps_valid_fields_when_a_re_request_fails(monkeypatch):
+    monkeypatch.setattr(risk_detector, "STRUCTURED_FIELD_RETRIES", 2)
+    _fake_chat(monkeypatch, [{"risk_level": "High"}, TimeoutError("timed out"), TimeoutError("timed out")])
+    result = _structured_risk_analysis(None, [{"role": "user", "content": "analyze"}])
+    assert not result.get("failed")
+    assert result["risk_level"] == "High"
+
+
+def test_structured_analysis_fails_without_any_valid_field(monkeypatch):
+    monkeypatch.setattr(risk_detector, "STRUCTURED_FIELD_RETRIES", 1)
+    _fake_chat(monkeypatch, [{"risk_level": "Severe"}, TimeoutError("timed out")])
+    result = _structured_risk_analysis(None, [{"role": "user", "content": "analyze"}])
+    assert result["failed"]
+    assert "timed out" in result["llm_feedback"]
+
+
+ANSWER = """Risk Analysis:
+- The judging evidence is a single review.
+Reviewer Voice: The record does not show judging at a national level.
+Suggested Language:
+Dr. Doe reviewed 40 manuscripts for three leading journals.
+
+She also chaired the 2023 program committee.
+
+Note: adjust the numbers to the exhibits.
+"""
+
+
+def _feed(stream, text, size=7):
+    completed = []
+    for start in range(0, len(text), size):
+        completed += stream.feed(text[start:start + size])
+    return completed
+
+
+def test_risk_output_stream_completes_sections_as_they_arrive():
+    stream = RiskOutputStream()
+    assert _feed(stream, ANSWER) == ["risk_analysis", "reviewer_voice", "suggested_language"]
+    assert stream.done
+    assert stream.text.endswith("She also chaired the 2023 program committee.\n\n")
+    assert "Note:" not in stream.text
+
+
+def test_risk_output_stream_stops_at_a_repeated_header():
+    stream = RiskOutputStream()
+    text = "Risk Analysis:\n- Thin.\nReviewer Voice: Unclear.\nRisk Analysis:\n- Thin again.\n"
+    assert _feed(stream, text) == ["risk_analysis", "reviewer_voice"]
+    assert stream.done
+    assert "again" not in stream.text
+
+
+def test_risk_output_stream_finish_only_completes_a_section_that_ended_on_its_own():
+    partial = "Risk Analysis:\n- Thin.\nReviewer Voice: The record"
+    cut = RiskOutputStream()
+    assert _feed(cut, partial) == []
+    assert cut.finish(stream_ended=False) == ["risk_analysis"]
+    assert cut.completed == ["risk_analysis"]
+    assert cut.text.endswith("Reviewer Voice: The record\n")
+
+    ended = RiskOutputStream()
+    _feed(ended, partial)
+    assert ended.finish(stream_ended=True) == ["risk_analysis", "reviewer_voice"]
+    assert not ended.done
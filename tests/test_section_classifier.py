@@ -0,0 +1,30 @@
+import json
+
+from src import section_classifier
+from src.section_classifier import load_learned_examples, record_examples
+
+
+def test_record_examples_is_opt_in(tmp_path, monkeypatch):
+    path = tmp_path / "section_examples.jsonl"
+    monkeypatch.setattr(section_classifier, "LEARNED_EXAMPLES_PATH", str(path))
+    monkeypatch.setattr(section_classifier, "LEARN_FROM_LLM", False)
+    record_examples([("Dr. Doe sat on the NSF panel.", "judging")])
+    assert not path.exists()
+
+    monkeypatch.setattr(section_classifier, "LEARN_FROM_LLM", True)
+    record_examples([("Dr. Doe sat on the NSF panel.", "judging")])
+    assert load_learned_examples(str(path)) == (["Dr. Doe sat on the NSF panel."], ["judging"])
+
+
+def test_learned_examples_file_is_capped(tmp_path):
+    path = str(tmp_path / "section_examples.jsonl")
+    for n in range(25):
+        record_examples([(f"paragraph {n}", "other"), ("repeated paragraph", "judging" if n % 2 else "awards")],
+                        path=path, limit=10)
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) <= 20
+    texts, labels = load_learned_examples(path, limit=10)
+    assert len(texts) == 10
+    assert "paragraph 24" in texts
+    assert labels[texts.index("repeated paragraph")] == "awards"